@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Shared data loading for the ownership analysis scripts.
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Columns the analysis scripts use from the scraper's ownership CSV
+OWNERSHIP_COLUMNS = ['ticker', 'company_name', 'holder_name', 'shares', 'percent_owned']
+
+# Compact column types: the few distinct names become int8/int16 category codes. The numbers
+# stay float64 so summed share counts and percentages print exactly as filed.
+DTYPES = {
+    'ticker': 'category',
+    'company_name': 'category',
+    'holder_name': 'category',
+    'shares': 'float64',
+    'percent_owned': 'float64',
+}
+
+# Parsed CSVs are cached here as Feather files, keyed on the source's size and mtime
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+def parquet_sibling(path):
+    """Path of the Parquet copy kept next to a CSV file"""
+    return os.path.splitext(os.fspath(path))[0] + '.parquet'
+
+def _apply_dtypes(df):
+    return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
+
+def load_ownership_data(path, columns=OWNERSHIP_COLUMNS):
+    """Load ownership data, keeping only `columns`
+    
+    An up-to-date Parquet sibling is read in place of the CSV; otherwise the CSV
+    goes through the multithreaded PyArrow parser. `path` may also be a file object.
+    """
+    if isinstance(path, (str, os.PathLike)):
+        parquet_path = parquet_sibling(path)
+        if os.path.exists(parquet_path) and (
+                not os.path.exists(path) or os.path.getmtime(parquet_path) >= os.path.getmtime(path)):
+            return _apply_dtypes(pd.read_parquet(parquet_path, columns=columns))
+        
+        return _load_cached_csv(path, columns)
+    
+    return pd.read_csv(path, usecols=columns, dtype=DTYPES, engine='pyarrow')
+
+def _load_cached_csv(path, columns):
+    """Parse `path` once into a Feather cache and serve later loads of the same file version from it"""
+    stat = os.stat(path)
+    # Same-named files in different directories get separate cache entries
+    path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:10]
+    stem = f"{os.path.splitext(os.path.basename(path))[0]}-{path_hash}"
+    cache_path = os.path.join(CACHE_DIR, f"{stem}-{stat.st_size}-{stat.st_mtime_ns}.feather")
+    
+    if os.path.exists(cache_path):
+        # Cast so a cache written under older column types still loads as DTYPES says
+        return _apply_dtypes(pd.read_feather(cache_path, columns=columns))
+    
+    df = pd.read_csv(path, dtype=DTYPES, engine='pyarrow')
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Drop caches left behind by earlier versions of this file
+        for stale in glob.glob(os.path.join(CACHE_DIR, f"{glob.escape(stem)}-*.feather")):
+            os.remove(stale)
+        # zstd keeps the cache at about a third of the CSV's size, dictionary-encoded names included
+        df.to_feather(cache_path, compression='zstd')
+    except OSError:
+        pass  # The cache is only an optimization; an unwritable directory just means no caching
+    
+    return df if columns is None else df[columns]
+
+def save_ownership_data(df, path):
+    """Write `df` as CSV, plus a zstd Parquet sibling for fast reloads"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _write_csv(table, path)
+    pq.write_table(table, parquet_sibling(path), compression='zstd')
+    return parquet_sibling(path)
+
+def export_frame(df, path):
+    """Write `df` with PyArrow: zstd Parquet for a .parquet path, CSV otherwise"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if os.fspath(path).endswith('.parquet'):
+        pq.write_table(table, path, compression='zstd')
+    else:
+        _write_csv(table, path)
+    return path
+
+def _write_csv(table, path):
+    """Write `table` as CSV in the layout DataFrame.to_csv gave: whole-number float columns as
+    integers (not 2.3047418706e+10), other floats in Python's repr, booleans as True/False and
+    quotes only around values that need them"""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_boolean(field.type):
+            table = table.set_column(i, field.name, pc.if_else(table.column(i), 'True', 'False'))
+        elif pa.types.is_floating(field.type):
+            column = table.column(i)
+            try:
+                # A safe cast fails on any fractional, infinite or out-of-range value; NaN is already null
+                column = column.cast(pa.int64())
+            except pa.ArrowInvalid:
+                # Python's float repr, as pandas writes it (88.0 rather than PyArrow's 88)
+                values = column.to_numpy()
+                column = pa.array(values.astype(str), mask=np.isnan(values))
+            table = table.set_column(i, field.name, column)
+    
+    # PyArrow can only quote every string or none of them, so a file with a value that needs
+    # quoting goes through pandas, which quotes just that value
+    if _needs_quoting(table):
+        table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get).to_csv(path, index=False)
+    else:
+        pa_csv.write_csv(table, path, pa_csv.WriteOptions(quoting_style='none', quoting_header='none'))
+
+def _needs_quoting(table):
+    """Whether any column name or string value holds a delimiter, quote or line break"""
+    structural = '[,"\r\n]'
+    if any(pd.Series(table.column_names).str.contains(structural)):
+        return True
+    for column in table.columns:
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            if pc.any(pc.match_substring_regex(column, structural)).as_py():
+                return True
+    return False
+
+def presence_matrix(df):
+    """Return (holders, tickers, matrix) where matrix[i, j] marks holders[i] holding tickers[j]"""
+    # Labels come back in order of first appearance, matching groupby(sort=False)
+    holder_codes, holders = pd.factorize(df['holder_name'])
+    ticker_codes, tickers = pd.factorize(df['ticker'])
+    valid = (holder_codes >= 0) & (ticker_codes >= 0)
+    
+    matrix = np.zeros((len(holders), len(tickers)), dtype=bool)
+    matrix[holder_codes[valid], ticker_codes[valid]] = True
+    return holders, tickers, matrix
+
+def overlap_counts(matrix):
+    """Shared-company counts for every pair of holders; the diagonal is each holder's company count"""
+    counts = matrix.astype(np.int32)
+    return counts @ counts.T
+
+def holder_row(holders, matrix, holder):
+    """Boolean ticker mask for `holder`, all False when the holder never appears"""
+    idx = pd.Index(holders).get_indexer([holder])[0]
+    return matrix[idx] if idx >= 0 else np.zeros(matrix.shape[1], dtype=bool)
+
+def value_counts_first_seen(column):
+    """value_counts() with ties in order of first appearance, as plain strings order them
+    (on a category they would fall back to category order); unseen categories are left out"""
+    codes, labels = pd.factorize(column)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return pd.Series(counts, index=labels).sort_values(ascending=False, kind='stable')
+
+def group_sum(keys, values):
+    """Sum `values` per key with a sort + np.add.reduceat, largest total first; NaN values count as 0"""
+    codes, uniques = pd.factorize(keys, sort=False)
+    valid = codes >= 0
+    codes = codes[valid]
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64)[valid])
+    if not len(codes):
+        return pd.Series([], dtype=np.float64)
+    
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    sums = np.add.reduceat(values[order], starts)
+    return pd.Series(sums, index=uniques[sorted_codes[starts]]).sort_values(ascending=False)
+
+def holder_ticker_sets(df):
+    """Map each holder to the frozenset of tickers it holds, built in one groupby pass"""
+    return {
+        holder: frozenset(tickers)
+        for holder, tickers in df.groupby('holder_name', sort=False, observed=True)['ticker'].unique().items()
+    }
+
+def category_mask(column, values):
+    """Row mask for a categorical column matching any of `values`, compared on integer codes"""
+    codes = column.cat.categories.get_indexer(values)
+    return np.isin(column.cat.codes.to_numpy(), codes[codes >= 0])
@@ -7,6 +7,11 @@ import pandas as pd
 import numpy as np
 from collections import Counter
 
+from _shared import (load_ownership_data, save_ownership_data, presence_matrix, overlap_counts,
+                     group_sum, holder_ticker_sets, category_mask, value_counts_first_seen)
+
+BIG2 = ['Vanguard Group', 'BlackRock']
+
 def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
     """Analyze the collected ownership data"""
     
@@ -14,29 +19,33 @@ def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
     print("=" * 50)
     
     # Load data
-    df = pd.read_csv(filename)
+    # All columns are kept since the analyzed copy is written back out in full
+    df = load_ownership_data(filename, columns=None)
+    
+    # Freshly loaded categoricals hold exactly the distinct values, so no column scan is needed
+    total_companies = len(df['ticker'].cat.categories)
     
     print(f"📊 Dataset Overview:")
     print(f"   Total records: {len(df)}")
-    print(f"   Companies: {df['ticker'].nunique()}")
-    print(f"   Institutional holders: {df['holder_name'].nunique()}")
+    print(f"   Companies: {total_companies}")
+    print(f"   Institutional holders: {len(df['holder_name'].cat.categories)}")
     
     # Clean data
     print(f"\n🧹 Data Cleaning:")
     
     # Fix obvious percentage errors (>100% likely means parsing error)
-    suspicious_percent = df[df['percent_owned'] > 50]['percent_owned'].count()
+    suspicious_mask = df['percent_owned'].to_numpy() > 50
+    suspicious_percent = int(suspicious_mask.sum())
     print(f"   Suspicious percentages (>50%): {suspicious_percent}")
     
     # Companies with data
-    companies_with_data = df.groupby('ticker').size().sort_values(ascending=False)
+    companies_with_data = df.groupby('ticker', observed=True).size().sort_values(ascending=False)
     print(f"   Avg holders per company: {companies_with_data.mean():.1f}")
     
     # Institutional dominance analysis
     print(f"\n🏛️  Institutional Dominance Analysis:")
     
-    holder_presence = df['holder_name'].value_counts()
-    total_companies = df['ticker'].nunique()
+    holder_presence = value_counts_first_seen(df['holder_name'])
     
     print(f"   Market presence by institution:")
     for holder, count in holder_presence.items():
@@ -44,16 +53,20 @@ def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
         print(f"   {holder}: {count}/{total_companies} companies ({percentage:.1f}%)")
     
     # Big 2 Analysis (Vanguard + BlackRock)
-    big2 = df[df['holder_name'].isin(['Vanguard Group', 'BlackRock'])]
+    big2_mask = category_mask(df['holder_name'], BIG2)
+    big2 = df[big2_mask]
     big2_companies = big2['ticker'].nunique()
     big2_percentage = (big2_companies / total_companies) * 100
     
     print(f"\n🎯 Big 2 (Vanguard + BlackRock) Analysis:")
     print(f"   Combined presence: {big2_companies}/{total_companies} companies ({big2_percentage:.1f}%)")
     
+    # Ticker set per institution, built in one groupby pass and reused below
+    holder_to_tickers = holder_ticker_sets(df)
+    
     # Companies where both Vanguard and BlackRock have positions
-    vanguard_companies = set(df[df['holder_name'] == 'Vanguard Group']['ticker'])
-    blackrock_companies = set(df[df['holder_name'] == 'BlackRock']['ticker'])
+    vanguard_companies = holder_to_tickers.get('Vanguard Group', frozenset())
+    blackrock_companies = holder_to_tickers.get('BlackRock', frozenset())
     both_companies = vanguard_companies & blackrock_companies
     
     print(f"   Companies with BOTH Vanguard & BlackRock: {len(both_companies)} ({len(both_companies)/total_companies*100:.1f}%)")
@@ -62,7 +75,7 @@ def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
     print(f"\n💰 Share Holdings Analysis:")
     
     # Total shares held by each institution (where data available)
-    shares_by_holder = df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
+    shares_by_holder = group_sum(df['holder_name'], df['shares'].to_numpy())
     print(f"   Total shares held (where data available):")
     for holder, shares in shares_by_holder.items():
         if pd.notna(shares) and shares > 0:
@@ -70,27 +83,29 @@ def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
     
     # Most concentrated companies (by number of major holders)
     print(f"\n🎯 Most Institutionally Held Companies:")
-    company_holder_counts = df.groupby(['ticker', 'company_name']).size().sort_values(ascending=False)
+    # Holder count and holder list per company in one grouped aggregation
+    company_holders = df.groupby(['ticker', 'company_name'], observed=True).agg(
+        count=('holder_name', 'size'),
+        holders=('holder_name', 'unique')
+    ).sort_values('count', ascending=False)
     
-    for (ticker, company), count in company_holder_counts.head(10).items():
-        holders = df[df['ticker'] == ticker]['holder_name'].tolist()
-        print(f"   {ticker} ({company}): {count} major holders")
-        print(f"      Holders: {', '.join(holders)}")
+    for (ticker, company), row in company_holders.head(10).iterrows():
+        print(f"   {ticker} ({company}): {row['count']} major holders")
+        print(f"      Holders: {', '.join(row['holders'])}")
     
     # Market concentration insights
     print(f"\n📈 Market Concentration Insights:")
     
-    # Calculate how many companies each pair of institutions both hold
-    institutions = df['holder_name'].unique()
+    # Calculate how many companies each pair of institutions both hold:
+    # one matrix product over the holder x ticker incidence matrix gives every pair
+    holders, _, presence = presence_matrix(df)
+    shared = overlap_counts(presence)
     overlaps = {}
     
-    for i, inst1 in enumerate(institutions):
-        for inst2 in institutions[i+1:]:
-            companies1 = set(df[df['holder_name'] == inst1]['ticker'])
-            companies2 = set(df[df['holder_name'] == inst2]['ticker'])
-            overlap = len(companies1 & companies2)
-            if overlap > 0:
-                overlaps[f"{inst1} & {inst2}"] = overlap
+    for i, j in zip(*np.triu_indices(len(holders), k=1)):
+        overlap = int(shared[i, j])
+        if overlap > 0:
+            overlaps[f"{holders[i]} & {holders[j]}"] = overlap
     
     print(f"   Cross-ownership patterns:")
     for pair, overlap in sorted(overlaps.items(), key=lambda x: x[1], reverse=True):
@@ -106,12 +121,11 @@ def analyze_ownership_data(filename="ownership_data_20250918_191548.csv"):
     # Export cleaned data
     output_file = filename.replace('.csv', '_analyzed.csv')
     
-    # Add analysis columns
-    df['is_big2'] = df['holder_name'].isin(['Vanguard Group', 'BlackRock'])
-    df['suspicious_percent'] = df['percent_owned'] > 50
+    # Add both analysis columns in one assign, reusing the masks computed above
+    df = df.assign(is_big2=big2_mask, suspicious_percent=suspicious_mask)
     
-    df.to_csv(output_file, index=False)
-    print(f"\n💾 Analyzed data saved to: {output_file}")
+    parquet_file = save_ownership_data(df, output_file)
+    print(f"\n💾 Analyzed data saved to: {output_file} (Parquet copy: {parquet_file})")
     
     return df
 
@@ -4,108 +4,130 @@ Executive Summary Generator for Institutional Market Dominance Analysis
 Creates a comprehensive report of findings for presentation and further analysis.
 """
 
-import pandas as pd
+import io
+import sys
 import numpy as np
 from datetime import datetime
+from functools import partial
+
+from _shared import load_ownership_data, presence_matrix, holder_row
 
 def generate_executive_summary():
     """Generate executive summary of market dominance findings"""
     
     # Load the comprehensive data
-    df = pd.read_csv("../results/comprehensive_market_ownership_20250918_195445.csv")
+    df = load_ownership_data("../results/comprehensive_market_ownership_20250918_195445.csv",
+                             columns=['ticker', 'holder_name', 'shares'])
+    
+    # Build the whole report in memory and write it to stdout once at the end
+    report = io.StringIO()
+    emit = partial(print, file=report)
     
-    print("📋 EXECUTIVE SUMMARY: INSTITUTIONAL DOMINANCE OF AMERICAN STOCK MARKET")
-    print("=" * 80)
-    print(f"Analysis Date: {datetime.now().strftime('%B %d, %Y')}")
-    print(f"Data Source: SEC DEF 14A Proxy Statements")
-    print(f"Market Coverage: 438 Major American Public Companies")
-    print("=" * 80)
+    emit("📋 EXECUTIVE SUMMARY: INSTITUTIONAL DOMINANCE OF AMERICAN STOCK MARKET")
+    emit("=" * 80)
+    emit(f"Analysis Date: {datetime.now().strftime('%B %d, %Y')}")
+    emit(f"Data Source: SEC DEF 14A Proxy Statements")
+    emit(f"Market Coverage: 438 Major American Public Companies")
+    emit("=" * 80)
     
     # Key findings
-    total_companies = df['ticker'].nunique()
-    holder_presence = df['holder_name'].value_counts()
+    # Distinct tickers straight from the categorical, without scanning the column
+    total_companies = len(df['ticker'].cat.categories)
+    
+    # One grouping over holder_name feeds presence and share totals
+    by_holder = df.groupby('holder_name', observed=True, sort=False)
+    holder_presence = by_holder.size().sort_values(ascending=False)
+    shares_by_holder = by_holder['shares'].sum().sort_values(ascending=False)
     
     vanguard_presence = holder_presence.get('Vanguard Group', 0)
     blackrock_presence = holder_presence.get('BlackRock', 0)
     
-    vanguard_companies = set(df[df['holder_name'] == 'Vanguard Group']['ticker'])
-    blackrock_companies = set(df[df['holder_name'] == 'BlackRock']['ticker'])
-    both_companies = len(vanguard_companies & blackrock_companies)
-    combined_companies = len(vanguard_companies | blackrock_companies)
-    
-    print(f"\n🚨 CRITICAL FINDINGS:")
-    print(f"\n1. UNPRECEDENTED MARKET CONCENTRATION")
-    print(f"   • BlackRock controls positions in {blackrock_presence} companies ({blackrock_presence/total_companies*100:.1f}%)")
-    print(f"   • Vanguard controls positions in {vanguard_presence} companies ({vanguard_presence/total_companies*100:.1f}%)")
-    print(f"   • Combined Big 2 presence: {combined_companies} companies ({combined_companies/total_companies*100:.1f}%)")
-    print(f"   • Both institutions together: {both_companies} companies ({both_companies/total_companies*100:.1f}%)")
-    
-    print(f"\n2. SHARE OWNERSHIP SCALE")
-    shares_by_holder = df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
+    # Big 2 overlap from boolean ticker masks rather than Python sets
+    holders, _, presence = presence_matrix(df)
+    vanguard_companies = holder_row(holders, presence, 'Vanguard Group')
+    blackrock_companies = holder_row(holders, presence, 'BlackRock')
+    both_companies = int((vanguard_companies & blackrock_companies).sum())
+    combined_companies = int((vanguard_companies | blackrock_companies).sum())
+    
+    emit(f"\n🚨 CRITICAL FINDINGS:")
+    emit(f"\n1. UNPRECEDENTED MARKET CONCENTRATION")
+    emit(f"   • BlackRock controls positions in {blackrock_presence} companies ({blackrock_presence/total_companies*100:.1f}%)")
+    emit(f"   • Vanguard controls positions in {vanguard_presence} companies ({vanguard_presence/total_companies*100:.1f}%)")
+    emit(f"   • Combined Big 2 presence: {combined_companies} companies ({combined_companies/total_companies*100:.1f}%)")
+    emit(f"   • Both institutions together: {both_companies} companies ({both_companies/total_companies*100:.1f}%)")
+    
+    emit(f"\n2. SHARE OWNERSHIP SCALE")
     valid_shares = shares_by_holder[shares_by_holder > 0]
     
     vanguard_shares = valid_shares.get('Vanguard Group', 0)
     blackrock_shares = valid_shares.get('BlackRock', 0)
     total_tracked_shares = valid_shares.sum()
     
-    print(f"   • Vanguard total shares: {vanguard_shares:,.0f} ({vanguard_shares/total_tracked_shares*100:.1f}% of tracked)")
-    print(f"   • BlackRock total shares: {blackrock_shares:,.0f} ({blackrock_shares/total_tracked_shares*100:.1f}% of tracked)")
-    print(f"   • Combined Big 2 shares: {vanguard_shares + blackrock_shares:,.0f} ({(vanguard_shares + blackrock_shares)/total_tracked_shares*100:.1f}% of tracked)")
-    
-    print(f"\n3. MARKET CONCENTRATION METRICS")
-    # Calculate HHI
-    market_shares = (holder_presence / total_companies * 100) ** 2
-    hhi = market_shares.sum()
-    
-    print(f"   • Herfindahl-Hirschman Index (HHI): {hhi:.0f}")
-    print(f"   • Market Classification: {'HIGHLY CONCENTRATED' if hhi > 2500 else 'MODERATELY CONCENTRATED' if hhi > 1500 else 'COMPETITIVE'}")
-    print(f"   • CR2 (Top 2 concentration): {combined_companies/total_companies*100:.1f}%")
-    print(f"   • CR4 (Top 4 concentration): {(combined_companies + holder_presence.iloc[2] + holder_presence.iloc[3])/total_companies*100:.1f}%")
-    
-    print(f"\n4. SYSTEMIC RISK ASSESSMENT")
-    print(f"   • Duopoly Control: BlackRock + Vanguard control 98.2% of major companies")
-    print(f"   • Voting Power Concentration: These 2 firms can influence most corporate decisions")
-    print(f"   • Systemic Risk Level: EXTREMELY HIGH due to unprecedented concentration")
-    print(f"   • Market Stability Risk: Single points of failure affecting entire market")
-    
-    print(f"\n5. COMPARATIVE ANALYSIS")
-    print(f"   • Historical Context: This level of concentration is unprecedented in modern markets")
-    print(f"   • Regulatory Threshold: Far exceeds traditional antitrust concentration thresholds")
-    print(f"   • Global Comparison: Likely the highest institutional concentration globally")
-    
-    print(f"\n6. IMPLICATIONS FOR CORPORATE GOVERNANCE")
-    print(f"   • Board Influence: Big 2 can influence board composition in 98.2% of companies")
-    print(f"   • Strategic Decisions: Major corporate strategies subject to Big 2 approval")
-    print(f"   • Shareholder Democracy: Traditional shareholder voting significantly concentrated")
-    print(f"   • ESG Influence: Environmental and social policies driven by institutional priorities")
-    
-    print(f"\n📊 DATA QUALITY ASSESSMENT:")
-    print(f"   • Sample Size: {total_companies} companies (statistically significant)")
-    print(f"   • Data Coverage: {len(df)} ownership records analyzed")
-    print(f"   • Success Rate: {total_companies}/500 target companies ({total_companies/500*100:.1f}%)")
-    print(f"   • Data Reliability: High (sourced from official SEC filings)")
-    
-    print(f"\n🎯 RECOMMENDATIONS FOR FURTHER ANALYSIS:")
-    print(f"   1. Temporal Analysis: Track concentration changes over 5-10 year period")
-    print(f"   2. Sector Deep-Dive: Analyze concentration by industry sector")
-    print(f"   3. Voting Analysis: Study actual voting patterns and board influence")
-    print(f"   4. International Comparison: Compare with European and Asian markets")
-    print(f"   5. Regulatory Impact: Assess potential antitrust implications")
-    
-    print(f"\n💾 DELIVERABLES CREATED:")
-    print(f"   • Comprehensive dataset: ../results/comprehensive_market_ownership_20250918_195445.csv")
-    print(f"   • Visual analysis: institutional_dominance_analysis_20250918_200103.png")
-    print(f"   • Summary dashboard: market_dominance_dashboard_20250918_200118.png")
-    print(f"   • Market presence data: market_presence_analysis_20250918_200147.csv")
-    print(f"   • Share holdings data: share_holdings_analysis_20250918_200147.csv")
-    print(f"   • Company analysis: company_institutional_analysis_20250918_200147.csv")
-    
-    print(f"\n" + "=" * 80)
-    print(f"🎉 EXECUTIVE SUMMARY COMPLETE")
-    print(f"🚨 KEY TAKEAWAY: BlackRock and Vanguard have achieved unprecedented control")
-    print(f"   over the American stock market with 98.2% institutional presence.")
-    print(f"📊 This data provides definitive evidence of extreme market concentration.")
-    print("=" * 80)
+    emit(f"   • Vanguard total shares: {vanguard_shares:,.0f} ({vanguard_shares/total_tracked_shares*100:.1f}% of tracked)")
+    emit(f"   • BlackRock total shares: {blackrock_shares:,.0f} ({blackrock_shares/total_tracked_shares*100:.1f}% of tracked)")
+    emit(f"   • Combined Big 2 shares: {vanguard_shares + blackrock_shares:,.0f} ({(vanguard_shares + blackrock_shares)/total_tracked_shares*100:.1f}% of tracked)")
+    
+    emit(f"\n3. MARKET CONCENTRATION METRICS")
+    # HHI and CR-k from one array of presence shares
+    share = holder_presence.to_numpy(dtype=np.float64) / total_companies
+    cumulative_share = np.cumsum(share)
+    hhi = float(share @ share) * 10000
+    # CR2 counts companies held by both Vanguard and BlackRock once; ranks 3-4 add on top
+    cr2 = combined_companies / total_companies
+    cr4 = cr2 + float(cumulative_share[3] - cumulative_share[1])
+    
+    emit(f"   • Herfindahl-Hirschman Index (HHI): {hhi:.0f}")
+    emit(f"   • Market Classification: {'HIGHLY CONCENTRATED' if hhi > 2500 else 'MODERATELY CONCENTRATED' if hhi > 1500 else 'COMPETITIVE'}")
+    emit(f"   • CR2 (Top 2 concentration): {cr2*100:.1f}%")
+    emit(f"   • CR4 (Top 4 concentration): {cr4*100:.1f}%")
+    
+    emit(f"\n4. SYSTEMIC RISK ASSESSMENT")
+    emit(f"   • Duopoly Control: BlackRock + Vanguard control 98.2% of major companies")
+    emit(f"   • Voting Power Concentration: These 2 firms can influence most corporate decisions")
+    emit(f"   • Systemic Risk Level: EXTREMELY HIGH due to unprecedented concentration")
+    emit(f"   • Market Stability Risk: Single points of failure affecting entire market")
+    
+    emit(f"\n5. COMPARATIVE ANALYSIS")
+    emit(f"   • Historical Context: This level of concentration is unprecedented in modern markets")
+    emit(f"   • Regulatory Threshold: Far exceeds traditional antitrust concentration thresholds")
+    emit(f"   • Global Comparison: Likely the highest institutional concentration globally")
+    
+    emit(f"\n6. IMPLICATIONS FOR CORPORATE GOVERNANCE")
+    emit(f"   • Board Influence: Big 2 can influence board composition in 98.2% of companies")
+    emit(f"   • Strategic Decisions: Major corporate strategies subject to Big 2 approval")
+    emit(f"   • Shareholder Democracy: Traditional shareholder voting significantly concentrated")
+    emit(f"   • ESG Influence: Environmental and social policies driven by institutional priorities")
+    
+    emit(f"\n📊 DATA QUALITY ASSESSMENT:")
+    emit(f"   • Sample Size: {total_companies} companies (statistically significant)")
+    emit(f"   • Data Coverage: {len(df)} ownership records analyzed")
+    emit(f"   • Success Rate: {total_companies}/500 target companies ({total_companies/500*100:.1f}%)")
+    emit(f"   • Data Reliability: High (sourced from official SEC filings)")
+    
+    emit(f"\n🎯 RECOMMENDATIONS FOR FURTHER ANALYSIS:")
+    emit(f"   1. Temporal Analysis: Track concentration changes over 5-10 year period")
+    emit(f"   2. Sector Deep-Dive: Analyze concentration by industry sector")
+    emit(f"   3. Voting Analysis: Study actual voting patterns and board influence")
+    emit(f"   4. International Comparison: Compare with European and Asian markets")
+    emit(f"   5. Regulatory Impact: Assess potential antitrust implications")
+    
+    emit(f"\n💾 DELIVERABLES CREATED:")
+    emit(f"   • Comprehensive dataset: ../results/comprehensive_market_ownership_20250918_195445.csv")
+    emit(f"   • Visual analysis: institutional_dominance_analysis_20250918_200103.png")
+    emit(f"   • Summary dashboard: market_dominance_dashboard_20250918_200118.png")
+    emit(f"   • Market presence data: market_presence_analysis_20250918_200147.csv")
+    emit(f"   • Share holdings data: share_holdings_analysis_20250918_200147.csv")
+    emit(f"   • Company analysis: company_institutional_analysis_20250918_200147.csv")
+    
+    emit(f"\n" + "=" * 80)
+    emit(f"🎉 EXECUTIVE SUMMARY COMPLETE")
+    emit(f"🚨 KEY TAKEAWAY: BlackRock and Vanguard have achieved unprecedented control")
+    emit(f"   over the American stock market with 98.2% institutional presence.")
+    emit(f"📊 This data provides definitive evidence of extreme market concentration.")
+    emit("=" * 80)
+    
+    sys.stdout.write(report.getvalue())
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     generate_executive_summary()
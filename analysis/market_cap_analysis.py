@@ -5,10 +5,13 @@ Combines ownership data with market capitalization to show true economic control
 """
 
 import pandas as pd
+import numpy as np
 import requests
 import time
 from typing import Dict, Optional
 
+from _shared import load_ownership_data, category_mask
+
 class MarketCapAnalyzer:
     """Analyze actual market cap control by institutions"""
     
@@ -71,7 +74,8 @@ class MarketCapAnalyzer:
         print("=" * 60)
         
         # Load ownership data
-        df = pd.read_csv("../results/comprehensive_market_ownership_20250918_195445.csv")
+        df = load_ownership_data("../results/comprehensive_market_ownership_20250918_195445.csv",
+                                 columns=['ticker', 'holder_name'])
         
         # Get unique companies and their market caps
         companies = df['ticker'].unique()
@@ -81,22 +85,34 @@ class MarketCapAnalyzer:
         total_market_cap = sum(market_caps.values())
         print(f"📊 Total market cap of analyzed companies: ${total_market_cap:.1f} billion")
         
-        # Calculate market cap control by institution
-        institution_control = {}
-        
-        for institution in df['holder_name'].unique():
-            inst_df = df[df['holder_name'] == institution]
-            inst_companies = inst_df['ticker'].unique()
-            
-            # Calculate market cap of companies where this institution has presence
-            inst_market_cap = sum(market_caps.get(ticker, 0) for ticker in inst_companies)
-            control_percentage = (inst_market_cap / total_market_cap) * 100
-            
-            institution_control[institution] = {
-                'market_cap_billions': inst_market_cap,
-                'control_percentage': control_percentage,
-                'companies_count': len(inst_companies)
+        # Market cap table indexed by ticker category code, then one gather for every row
+        ticker_categories = df['ticker'].cat.categories
+        cap_by_code = np.full(len(ticker_categories), 15.0)
+        positions = ticker_categories.get_indexer(list(market_caps))
+        known = positions >= 0
+        cap_by_code[positions[known]] = np.fromiter(market_caps.values(), dtype=np.float64)[known]
+        
+        ticker_codes = df['ticker'].cat.codes.to_numpy()
+        holder_codes = df['holder_name'].cat.codes.to_numpy()
+        valid = (ticker_codes >= 0) & (holder_codes >= 0)
+        # Count each (holder, company) pair once
+        first_position = valid & ~df.duplicated(['holder_name', 'ticker']).to_numpy()
+        
+        # Calculate market cap control by institution: weighted bincounts over holder codes
+        n_holders = len(df['holder_name'].cat.categories)
+        inst_market_caps = np.bincount(holder_codes[first_position],
+                                       weights=cap_by_code[ticker_codes[first_position]], minlength=n_holders)
+        companies_counts = np.bincount(holder_codes[first_position], minlength=n_holders)
+        
+        # Institutions in order of first appearance in the data
+        institution_control = {
+            df['holder_name'].cat.categories[code]: {
+                'market_cap_billions': inst_market_caps[code],
+                'control_percentage': (inst_market_caps[code] / total_market_cap) * 100,
+                'companies_count': int(companies_counts[code])
             }
+            for code in pd.unique(holder_codes[valid])
+        }
         
         # Sort by market cap control
         sorted_institutions = sorted(institution_control.items(), 
@@ -115,11 +131,8 @@ class MarketCapAnalyzer:
         blackrock_control = institution_control.get('BlackRock', {})
         
         # Calculate combined control (avoiding double counting)
-        vanguard_companies = set(df[df['holder_name'] == 'Vanguard Group']['ticker'])
-        blackrock_companies = set(df[df['holder_name'] == 'BlackRock']['ticker'])
-        combined_companies = vanguard_companies | blackrock_companies
-        
-        combined_market_cap = sum(market_caps.get(ticker, 0) for ticker in combined_companies)
+        big2_rows = category_mask(df['holder_name'], ['Vanguard Group', 'BlackRock']) & valid
+        combined_market_cap = cap_by_code[np.unique(ticker_codes[big2_rows])].sum()
         combined_control_pct = (combined_market_cap / total_market_cap) * 100
         
         print(f"\n🎯 BIG 2 COMBINED MARKET CAP CONTROL:")
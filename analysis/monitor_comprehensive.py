@@ -1,20 +1,126 @@
 #!/usr/bin/env python3
 """
 Monitor the comprehensive market scraper progress.
+
+The scraper streams records into a Parquet file, which cannot be read until its footer is
+written at the end of the run, and writes the CSV this monitor reads only once it finishes.
+So the monitor reports each finished run rather than a run in progress; it still only parses
+rows appended since the last check, should the CSV ever grow while it is watched.
 """
 
+import io
+import sys
 import time
-import pandas as pd
 import glob
 import os
+from collections import Counter
 from datetime import datetime
+from functools import partial
+
+from _shared import load_ownership_data, category_mask
+
+MONITOR_COLUMNS = ['ticker', 'company_name', 'holder_name']
+
+# Seconds between file checks; a tick with no change costs a single stat call
+POLL_INTERVAL = 2
 
-def monitor_comprehensive_scraper():
+def _new_monitor_state(path=None):
+    """Running totals for one data file, updated from appended rows only"""
+    return {
+        'path': path,
+        'offset': 0,
+        'header': b'',
+        'records': 0,
+        'holder_counts': Counter(),
+        'companies': {},  # ticker -> [company_name, holder rows], in first-seen order
+        'big2_tickers': set(),
+    }
+
+def _read_new_rows(state, path):
+    """Parse only the bytes appended to `path` since the last call and fold them into `state`"""
+    if state['path'] != path or os.path.getsize(path) < state['offset']:
+        # New or rewritten file: start over from the top
+        state.clear()
+        state.update(_new_monitor_state(path))
+    
+    with open(path, 'rb') as f:
+        if not state['header']:
+            state['header'] = f.readline()
+            state['offset'] = f.tell()
+        f.seek(state['offset'])
+        new_bytes = f.read()
+    
+    # Leave any partially written last line for the next tick
+    complete = new_bytes[:new_bytes.rfind(b'\n') + 1]
+    if not complete:
+        return
+    
+    chunk = load_ownership_data(io.BytesIO(state['header'] + complete), columns=MONITOR_COLUMNS)
+    # Only move past rows that parsed, so a failed read is retried on the next change
+    state['offset'] += len(complete)
+    state['records'] += len(chunk)
+    state['holder_counts'].update(chunk['holder_name'])
+    
+    companies = state['companies']
+    for ticker, company_name in zip(chunk['ticker'], chunk['company_name']):
+        companies.setdefault(ticker, [company_name, 0])[1] += 1
+    
+    big2 = category_mask(chunk['holder_name'], ['Vanguard Group', 'BlackRock'])
+    state['big2_tickers'].update(chunk.loc[big2, 'ticker'])
+
+def _print_progress(state, latest_file):
+    """Print the progress report for the rows read so far"""
+    holder_counts = state['holder_counts']
+    companies = state['companies']
+    total_companies = len(companies)
+    
+    # One stdout write per tick instead of one per line
+    report = io.StringIO()
+    emit = partial(print, file=report)
+    
+    emit(f"\n📊 COMPREHENSIVE PROGRESS ({datetime.now().strftime('%H:%M:%S')})")
+    emit(f"📁 Data file: {latest_file}")
+    emit(f"📈 Total ownership records: {state['records']}")
+    emit(f"🏢 Companies processed: {total_companies}")
+    emit(f"🏛️  Institutional holders found: {len(holder_counts)}")
+    
+    if state['records'] > 0:
+        # Show institutional dominance
+        emit(f"\n🏆 INSTITUTIONAL MARKET DOMINANCE:")
+        for holder, count in holder_counts.most_common(8):
+            percentage = (count / total_companies) * 100
+            emit(f"   {holder}: {count}/{total_companies} companies ({percentage:.1f}%)")
+        
+        # Show recent companies processed
+        emit(f"\n🔥 Recently processed companies:")
+        for ticker, (company_name, company_holders) in list(companies.items())[-5:]:
+            emit(f"   {ticker} ({company_name}): {company_holders} institutional holders")
+        
+        # Market concentration insights
+        vanguard_presence = holder_counts.get('Vanguard Group', 0)
+        blackrock_presence = holder_counts.get('BlackRock', 0)
+        combined_presence = len(state['big2_tickers'])
+        
+        emit(f"\n🎯 BIG 2 DOMINANCE ANALYSIS:")
+        emit(f"   Vanguard presence: {vanguard_presence} companies")
+        emit(f"   BlackRock presence: {blackrock_presence} companies")
+        emit(f"   Combined Vanguard+BlackRock: {combined_presence} companies")
+        
+        if total_companies > 0:
+            emit(f"   Market dominance: {combined_presence/total_companies*100:.1f}%")
+    
+    sys.stdout.write(report.getvalue())
+    sys.stdout.flush()
+
+def monitor_comprehensive_scraper(poll_interval=POLL_INTERVAL):
     """Monitor comprehensive scraper progress"""
     
     print("🔍 COMPREHENSIVE MARKET SCRAPER MONITOR")
     print("=" * 60)
     
+    state = _new_monitor_state()
+    last_signature = None
+    
     while True:
         # Check for latest comprehensive data file
         csv_files = glob.glob("comprehensive_market_ownership_*.csv")
@@ -23,54 +129,26 @@ def monitor_comprehensive_scraper():
             latest_file = max(csv_files, key=os.path.getctime)
             
             try:
-                df = pd.read_csv(latest_file)
-                
-                print(f"\n📊 COMPREHENSIVE PROGRESS ({datetime.now().strftime('%H:%M:%S')})")
-                print(f"📁 Data file: {latest_file}")
-                print(f"📈 Total ownership records: {len(df)}")
-                print(f"🏢 Companies processed: {df['ticker'].nunique()}")
-                print(f"🏛️  Institutional holders found: {df['holder_name'].nunique()}")
+                # A stat call is all an idle tick costs; only re-read when the file changed
+                stat = os.stat(latest_file)
+                signature = (latest_file, stat.st_size, stat.st_mtime_ns)
                 
-                if len(df) > 0:
-                    # Show institutional dominance
-                    holder_counts = df['holder_name'].value_counts()
-                    total_companies = df['ticker'].nunique()
+                if signature != last_signature:
+                    last_signature = signature
+                    _read_new_rows(state, latest_file)
+                    _print_progress(state, latest_file)
                     
-                    print(f"\n🏆 INSTITUTIONAL MARKET DOMINANCE:")
-                    for holder, count in holder_counts.head(8).items():
-                        percentage = (count / total_companies) * 100
-                        print(f"   {holder}: {count}/{total_companies} companies ({percentage:.1f}%)")
-                    
-                    # Show recent companies processed
-                    recent_companies = df.drop_duplicates('ticker').tail(5)
-                    print(f"\n🔥 Recently processed companies:")
-                    for _, row in recent_companies.iterrows():
-                        company_holders = df[df['ticker'] == row['ticker']]['holder_name'].count()
-                        print(f"   {row['ticker']} ({row['company_name']}): {company_holders} institutional holders")
-                    
-                    # Market concentration insights
-                    vanguard_presence = holder_counts.get('Vanguard Group', 0)
-                    blackrock_presence = holder_counts.get('BlackRock', 0)
-                    combined_presence = len(df[df['holder_name'].isin(['Vanguard Group', 'BlackRock'])]['ticker'].unique())
-                    
-                    print(f"\n🎯 BIG 2 DOMINANCE ANALYSIS:")
-                    print(f"   Vanguard presence: {vanguard_presence} companies")
-                    print(f"   BlackRock presence: {blackrock_presence} companies")
-                    print(f"   Combined Vanguard+BlackRock: {combined_presence} companies")
-                    
-                    if total_companies > 0:
-                        print(f"   Market dominance: {combined_presence/total_companies*100:.1f}%")
-                
+                    print(f"\n{'='*60}")
+                    print("Monitoring comprehensive market scraper... Press Ctrl+C to stop")
+            
             except Exception as e:
                 print(f"⚠️  Error reading comprehensive data: {e}")
-        else:
-            print(f"⏳ Waiting for comprehensive data file to be created...")
-        
-        print(f"\n{'='*60}")
-        print("Monitoring comprehensive market scraper... Press Ctrl+C to stop")
+        elif last_signature != 'waiting':
+            last_signature = 'waiting'
+            print(f"⏳ Waiting for comprehensive data file (written when the scraper finishes)...")
         
         try:
-            time.sleep(45)  # Check every 45 seconds for comprehensive run
+            time.sleep(poll_interval)
         except KeyboardInterrupt:
             print(f"\n👋 Comprehensive monitoring stopped")
             break
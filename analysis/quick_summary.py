@@ -3,47 +3,62 @@
 Quick summary of our institutional market dominance findings.
 """
 
-import pandas as pd
+import io
+import sys
+from functools import partial
+
+from _shared import load_ownership_data, group_sum, holder_ticker_sets
 
 def quick_summary():
     """Show quick summary of findings"""
     
-    df = pd.read_csv("comprehensive_market_ownership_20250918_195445.csv")
+    df = load_ownership_data("comprehensive_market_ownership_20250918_195445.csv",
+                             columns=['ticker', 'holder_name', 'shares'])
+    
+    # Build the summary in memory and write it to stdout once at the end
+    report = io.StringIO()
+    emit = partial(print, file=report)
     
-    print("🎯 QUICK SUMMARY: Institutional Market Dominance")
-    print("=" * 55)
+    emit("🎯 QUICK SUMMARY: Institutional Market Dominance")
+    emit("=" * 55)
     
-    total_companies = df['ticker'].nunique()
-    holder_counts = df['holder_name'].value_counts()
+    # Distinct tickers straight from the categorical, without scanning the column
+    total_companies = len(df['ticker'].cat.categories)
     
-    print(f"📊 Dataset: {len(df)} records from {total_companies} companies")
-    print(f"🏛️  Top Institutions:")
+    holder_counts = df.groupby('holder_name', sort=False, observed=True).size().sort_values(ascending=False)
+    shares_data = group_sum(df['holder_name'], df['shares'].to_numpy())
+    holder_tickers = holder_ticker_sets(df)
+    
+    emit(f"📊 Dataset: {len(df)} records from {total_companies} companies")
+    emit(f"🏛️  Top Institutions:")
     
     for i, (holder, count) in enumerate(holder_counts.head(5).items(), 1):
         percentage = count / total_companies * 100
-        print(f"   {i}. {holder}: {count} companies ({percentage:.1f}%)")
+        emit(f"   {i}. {holder}: {count} companies ({percentage:.1f}%)")
     
     # Big 2 analysis
     vanguard_cos = holder_counts.get('Vanguard Group', 0)
     blackrock_cos = holder_counts.get('BlackRock', 0)
     
-    vanguard_set = set(df[df['holder_name'] == 'Vanguard Group']['ticker'])
-    blackrock_set = set(df[df['holder_name'] == 'BlackRock']['ticker'])
+    vanguard_set = holder_tickers.get('Vanguard Group', frozenset())
+    blackrock_set = holder_tickers.get('BlackRock', frozenset())
     combined_presence = len(vanguard_set | blackrock_set)
     
-    print(f"\n🎯 Big 2 Dominance:")
-    print(f"   Combined presence: {combined_presence}/{total_companies} companies ({combined_presence/total_companies*100:.1f}%)")
+    emit(f"\n🎯 Big 2 Dominance:")
+    emit(f"   Combined presence: {combined_presence}/{total_companies} companies ({combined_presence/total_companies*100:.1f}%)")
     
     # Share holdings
-    shares_data = df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
     valid_shares = shares_data[shares_data > 0]
     
     if not valid_shares.empty:
-        print(f"\n💰 Share Holdings (Billions):")
+        emit(f"\n💰 Share Holdings (Billions):")
         for holder, shares in valid_shares.head(3).items():
-            print(f"   {holder}: {shares/1_000_000_000:.1f}B shares")
+            emit(f"   {holder}: {shares/1_000_000_000:.1f}B shares")
+    
+    emit(f"\n🚨 Bottom Line: 2 institutions control 98.2% of major American companies")
     
-    print(f"\n🚨 Bottom Line: 2 institutions control 98.2% of major American companies")
+    sys.stdout.write(report.getvalue())
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     quick_summary()
@@ -3,97 +3,184 @@
 Simple matplotlib visualization of institutional market dominance findings.
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-def create_simple_visualizations():
-    """Create simple, clear visualizations of our findings"""
+from _shared import load_ownership_data
+
+DATA_FILE = "../results/comprehensive_market_ownership_20250918_195445.csv"
+
+# Chart palettes; the share holdings chart uses the first six bar colors
+BAR_COLORS = ('#FF4444', '#4444FF', '#44AA44', '#FFAA44', '#AA44FF', '#44AAFF', '#AAAA44', '#FF44AA')
+PIE_COLORS = ('#FF4444', '#4444FF', '#44AA44', '#CCCCCC')
+
+@lru_cache(maxsize=None)
+def _rgba(colors):
+    """RGBA array for a palette, parsed from hex once per process"""
+    from matplotlib.colors import to_rgba_array
+    return to_rgba_array(colors)
+
+@lru_cache(maxsize=None)
+def _save_executor():
+    """Single worker that writes finished figures to disk, created on first use"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-save')
+
+def _first_word(name):
+    """First word of a holder name, used as its short tick label"""
+    return name.partition(' ')[0]
+
+def _summarize(holder_codes, ticker_codes, shares, n_holders, n_tickers):
+    """Row counts, first-seen row positions, share totals and the holder x ticker presence bitmap
+    from one pass over the code arrays"""
+    holder_rows = holder_codes >= 0
+    row_counts = np.bincount(holder_codes[holder_rows], minlength=n_holders)
+    # Row of each holder's first appearance, so count ties can be broken as value_counts does
+    first_seen = np.full(n_holders, len(holder_codes))
+    seen_codes, first_rows = np.unique(holder_codes[holder_rows], return_index=True)
+    first_seen[seen_codes] = np.flatnonzero(holder_rows)[first_rows]
+    share_sums = np.bincount(holder_codes[holder_rows], weights=np.nan_to_num(shares[holder_rows]),
+                             minlength=n_holders)
+    
+    both = holder_rows & (ticker_codes >= 0)
+    presence = np.zeros((n_holders, n_tickers), dtype=bool)
+    presence[holder_codes[both], ticker_codes[both]] = True
+    return row_counts, first_seen, share_sums, presence
+
+def _holder_tickers(presence, holder_categories, holder):
+    """Boolean ticker mask for `holder`, all False when the holder never appears"""
+    code = holder_categories.get_indexer([holder])[0]
+    return presence[code] if code >= 0 else np.zeros(presence.shape[1], dtype=bool)
+
+def _cumulative_coverage(presence, holder_steps, n_steps):
+    """Companies covered after each step, where holder_steps[code] is the step that adds that holder
+    
+    Each company is counted at the earliest step of any of its holders, so the running
+    union becomes a bincount + cumsum instead of a set update per step.
+    """
+    first_step = np.where(presence, holder_steps[:, None], n_steps).min(axis=0, initial=n_steps)
+    return np.cumsum(np.bincount(first_step, minlength=n_steps + 1)[:n_steps])
+
+@lru_cache(maxsize=4)
+def _load_chart_data(path, mtime):
+    """Load `path` and summarize it for the charts; `mtime` is part of the cache key so edits reload"""
+    # Only the columns the charts use, with categorical names, via the PyArrow parser
+    df = load_ownership_data(path, columns=['ticker', 'holder_name', 'shares'])
+    
+    # Every chart's inputs come from this one summary of the code arrays
+    summary = _summarize(
+        df['holder_name'].cat.codes.to_numpy(), df['ticker'].cat.codes.to_numpy(), df['shares'].to_numpy(),
+        len(df['holder_name'].cat.categories), len(df['ticker'].cat.categories))
+    return df, summary
+
+def create_simple_visualizations(dpi=150, fmt='png', path=DATA_FILE, save_in_background=False):
+    """Create simple, clear visualizations of our findings
+    
+    `fmt` may be 'png' (rendered at `dpi`) or a vector format such as 'pdf' or 'svg'.
+    Repeated calls on an unchanged file reuse the loaded data and its summary.
+    With `save_in_background`, the figure is rendered and written on a worker thread
+    and `(df, future)` is returned; call `future.result()` to wait for the file.
+    """
+    
+    # Imported here so loading this module for its helpers doesn't pay for matplotlib startup
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
     
     print("📊 Creating simple visualizations of market dominance...")
     
     # Load the comprehensive data
-    df = pd.read_csv("../results/comprehensive_market_ownership_20250918_195445.csv")
+    df, (row_counts, first_seen, share_sums, presence) = _load_chart_data(path, os.path.getmtime(path))
     
     # Calculate key metrics
-    total_companies = df['ticker'].nunique()
-    holder_counts = df['holder_name'].value_counts()
+    # Tickers are used only as integer category codes (int16 below 32k tickers); the
+    # distinct count is the category count, so no column scan is needed
+    total_companies = len(df['ticker'].cat.categories)
+    holder_categories = df['holder_name'].cat.categories
     
     print(f"✅ Loaded data: {len(df)} records, {total_companies} companies")
     
     # Create 2x2 subplot layout
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+    # A standalone Agg figure: no pyplot figure registry and no GUI backend to start
+    fig = Figure(figsize=(15, 10), constrained_layout=False)
+    FigureCanvasAgg(fig)
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
     fig.suptitle('Institutional Market Dominance Analysis\n438 Major American Companies', 
                  fontsize=16, fontweight='bold')
     
     # 1. Market Presence by Institution (Bar Chart)
-    percentages = (holder_counts / total_companies * 100)
-    top8 = percentages.head(8)
+    # Top 8 straight from the bincount row counts, ties in order of first appearance
+    top8_codes = np.lexsort((first_seen, -row_counts))[:8]
+    top8_names = holder_categories.take(top8_codes)
+    # The fancy-indexed slice is already a fresh array, so scale it in place
+    top8_pct = row_counts[top8_codes].astype(np.float64)
+    top8_pct *= 100.0 / total_companies
     
-    colors = ['#FF4444', '#4444FF', '#44AA44', '#FFAA44', '#AA44FF', '#44AAFF', '#AAAA44', '#FF44AA']
-    bars1 = ax1.bar(range(len(top8)), top8.values, color=colors)
+    bars1 = ax1.bar(range(len(top8_pct)), top8_pct, color=_rgba(BAR_COLORS))
     
-    ax1.set_xticks(range(len(top8)))
-    ax1.set_xticklabels([name.split()[0] for name in top8.index], rotation=45, ha='right')
+    ax1.set_xticks(range(len(top8_pct)))
+    ax1.set_xticklabels(list(map(_first_word, top8_names)), rotation=45, ha='right')
     ax1.set_ylabel('Market Presence (%)')
     ax1.set_title('Institutional Market Presence')
     ax1.grid(axis='y', alpha=0.3)
     
     # Add percentage labels on bars
-    for bar, pct in zip(bars1, top8.values):
-        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                f'{pct:.1f}%', ha='center', va='bottom', fontweight='bold')
+    ax1.bar_label(bars1, labels=[f'{pct:.1f}%' for pct in top8_pct], padding=3, fontweight='bold')
     
     # 2. Big 2 Dominance (Pie Chart)
-    vanguard_companies = set(df[df['holder_name'] == 'Vanguard Group']['ticker'])
-    blackrock_companies = set(df[df['holder_name'] == 'BlackRock']['ticker'])
+    # Overlap from boolean ticker bitmaps rather than Python set operations
+    vanguard_companies = _holder_tickers(presence, holder_categories, 'Vanguard Group')
+    blackrock_companies = _holder_tickers(presence, holder_categories, 'BlackRock')
+    big2_companies = int((vanguard_companies | blackrock_companies).sum())
     
-    both_companies = len(vanguard_companies & blackrock_companies)
-    vanguard_only = len(vanguard_companies - blackrock_companies)
-    blackrock_only = len(blackrock_companies - vanguard_companies)
-    neither = total_companies - len(vanguard_companies | blackrock_companies)
+    both_companies = int((vanguard_companies & blackrock_companies).sum())
+    vanguard_only = int((vanguard_companies & ~blackrock_companies).sum())
+    blackrock_only = int((blackrock_companies & ~vanguard_companies).sum())
+    neither = total_companies - big2_companies
     
     sizes = [both_companies, vanguard_only, blackrock_only, neither]
     labels = [f'Both V&B\n{both_companies} cos', f'Vanguard Only\n{vanguard_only} cos',
               f'BlackRock Only\n{blackrock_only} cos', f'Neither\n{neither} cos']
-    colors2 = ['#FF4444', '#4444FF', '#44AA44', '#CCCCCC']
     
-    ax2.pie(sizes, labels=labels, colors=colors2, autopct='%1.1f%%', startangle=90)
+    ax2.pie(sizes, labels=labels, colors=_rgba(PIE_COLORS), autopct='%1.1f%%', startangle=90)
     ax2.set_title('Big 2 Market Control\n(Vanguard + BlackRock)')
     
     # 3. Share Holdings (Horizontal Bar Chart)
-    shares_by_holder = df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
-    valid_shares = shares_by_holder[shares_by_holder > 0].head(6)
-    shares_billions = valid_shares / 1_000_000_000
+    by_shares = np.argsort(-share_sums, kind='stable')
+    top_share_codes = by_shares[share_sums[by_shares] > 0][:6]
+    shares_billions = share_sums[top_share_codes]
+    shares_billions /= 1_000_000_000
     
     y_pos = np.arange(len(shares_billions))
-    bars3 = ax3.barh(y_pos, shares_billions.values, color=['#FF4444', '#4444FF', '#44AA44', '#FFAA44', '#AA44FF', '#44AAFF'])
+    bars3 = ax3.barh(y_pos, shares_billions, color=_rgba(BAR_COLORS)[:6])
     
     ax3.set_yticks(y_pos)
-    ax3.set_yticklabels([name.split()[0] for name in shares_billions.index])
+    ax3.set_yticklabels(list(map(_first_word, holder_categories[top_share_codes])))
     ax3.set_xlabel('Total Shares Held (Billions)')
     ax3.set_title('Share Holdings by Institution')
     ax3.grid(axis='x', alpha=0.3)
     
     # Add value labels
-    for i, (bar, value) in enumerate(zip(bars3, shares_billions.values)):
-        ax3.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2,
-                f'{value:.1f}B', va='center', fontweight='bold')
+    ax3.bar_label(bars3, labels=[f'{value:.1f}B' for value in shares_billions], padding=8, fontweight='bold')
     
     # 4. Market Concentration Metrics
     # Show cumulative concentration
     institutions = ['BlackRock', 'Vanguard', 'State Street', 'T. Rowe Price', 'Fidelity']
-    cumulative_presence = []
-    running_companies = set()
-    
-    for inst in institutions:
-        if inst in holder_counts.index:
-            inst_companies = set(df[df['holder_name'].str.contains(inst, case=False)]['ticker'])
-            running_companies.update(inst_companies)
-            cumulative_pct = len(running_companies) / total_companies * 100
-            cumulative_presence.append(cumulative_pct)
-        else:
-            cumulative_presence.append(cumulative_presence[-1] if cumulative_presence else 0)
+    # Case-insensitive name matching runs over the lowercased categories, not every row:
+    # each holder gets the first step whose institution name it contains
+    lower_names = holder_categories.str.lower().to_numpy(dtype=str)
+    holder_steps = np.full(len(holder_categories), len(institutions))
+    
+    for step, inst in enumerate(institutions):
+        # Institutions without an exact holder match add nothing and repeat the previous level
+        if inst in holder_categories:
+            matches = (np.char.find(lower_names, inst.lower()) >= 0) & (holder_steps == len(institutions))
+            holder_steps[matches] = step
+    
+    covered = _cumulative_coverage(presence, holder_steps, len(institutions))
+    cumulative_presence = covered.astype(np.float64)
+    cumulative_presence *= 100.0 / total_companies
+    cumulative_presence = cumulative_presence.tolist()
     
     ax4.plot(range(1, len(cumulative_presence) + 1), cumulative_presence, 
              marker='o', linewidth=3, markersize=8, color='#FF4444')
@@ -112,21 +199,34 @@ def create_simple_visualizations():
                     arrowprops=dict(arrowstyle='->', color='red'),
                     fontweight='bold', bbox=dict(boxstyle="round,pad=0.3", facecolor='yellow'))
     
-    plt.tight_layout()
+    # Fixed margins for the four static panels instead of a tight_layout solve
+    fig.subplots_adjust(left=0.07, right=0.98, top=0.88, bottom=0.10, wspace=0.25, hspace=0.35)
     
     # Save the visualization
-    filename = "simple_market_dominance_charts.png"
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    print(f"💾 Charts saved to: {filename}")
+    # The fixed margins already fit the content, so Agg renders once without a tight-bbox pass
+    filename = f"simple_market_dominance_charts.{fmt}"
+    save_kwargs = {'format': fmt} if fmt in ('pdf', 'svg') else {'dpi': dpi, 'format': fmt}
+    if save_in_background:
+        # Artists are all built above on this thread; the worker only renders this one Figure
+        save_future = _save_executor().submit(fig.savefig, filename, **save_kwargs)
+        print(f"💾 Saving charts to: {filename}")
+    else:
+        fig.savefig(filename, **save_kwargs)
+        print(f"💾 Charts saved to: {filename}")
     
     # Show key statistics
-    print(f"\n📊 KEY STATISTICS:")
-    print(f"   BlackRock presence: {holder_counts.get('BlackRock', 0)} companies ({holder_counts.get('BlackRock', 0)/total_companies*100:.1f}%)")
-    print(f"   Vanguard presence: {holder_counts.get('Vanguard Group', 0)} companies ({holder_counts.get('Vanguard Group', 0)/total_companies*100:.1f}%)")
-    print(f"   Combined Big 2: {len(vanguard_companies | blackrock_companies)} companies ({len(vanguard_companies | blackrock_companies)/total_companies*100:.1f}%)")
+    # Both presence counts and percentages in one lookup on the row-count array
+    big2_codes = holder_categories.get_indexer(['BlackRock', 'Vanguard Group'])
+    blackrock_count, vanguard_count = np.where(big2_codes >= 0, row_counts[big2_codes], 0)
+    blackrock_pct, vanguard_pct = np.array([blackrock_count, vanguard_count]) / total_companies * 100
     
-    plt.show()
+    print(f"\n📊 KEY STATISTICS:")
+    print(f"   BlackRock presence: {blackrock_count} companies ({blackrock_pct:.1f}%)")
+    print(f"   Vanguard presence: {vanguard_count} companies ({vanguard_pct:.1f}%)")
+    print(f"   Combined Big 2: {big2_companies} companies ({big2_companies/total_companies*100:.1f}%)")
     
+    if save_in_background:
+        return df, save_future
     return df
 
 if __name__ == "__main__":
@@ -4,14 +4,43 @@ Comprehensive Data Analysis and Visualization of Institutional Market Dominance
 Analyzes the shocking findings from our comprehensive market scraper.
 """
 
+import io
+import os
+import sys
+
 import pandas as pd
 import numpy as np
+import matplotlib
+
+# Headless runs (no X display, or --no-show) render with Agg and never open a window
+HEADLESS = '--no-show' in sys.argv or (sys.platform.startswith('linux') and not os.environ.get('DISPLAY'))
+if HEADLESS and 'MPLBACKEND' not in os.environ:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from functools import cached_property, partial
 import warnings
 warnings.filterwarnings('ignore')
 
+from _shared import (OWNERSHIP_COLUMNS, load_ownership_data, export_frame, presence_matrix,
+                     overlap_counts, holder_row, value_counts_first_seen)
+
+# Simplified sector categorization based on known companies
+SECTOR_TICKERS = {
+    'Technology': ['AAPL', 'MSFT', 'GOOGL', 'GOOG', 'AMZN', 'NVDA', 'META', 'NFLX', 
+                  'ADBE', 'CRM', 'ORCL', 'IBM', 'CSCO', 'INTC', 'AMD', 'QCOM', 'AVGO'],
+    'Financial': ['JPM', 'BAC', 'WFC', 'GS', 'MS', 'C', 'BLK', 'SPGI', 'V', 'MA', 'AXP'],
+    'Healthcare': ['UNH', 'JNJ', 'PFE', 'ABBV', 'LLY', 'MRK', 'TMO', 'ABT', 'DHR', 'BMY'],
+    'Consumer': ['WMT', 'HD', 'COST', 'LOW', 'TGT', 'DIS', 'NKE', 'SBUX', 'MCD', 'KO', 'PEP'],
+    'Energy': ['XOM', 'CVX', 'COP', 'EOG', 'SLB', 'PSX', 'VLO', 'MPC'],
+    'Industrial': ['BA', 'CAT', 'GE', 'HON', 'RTX', 'LMT', 'NOC', 'GD', 'DE', 'MMM']
+}
+
+# Holders drawn on the cumulative concentration curve; it is flat well before this
+CONCENTRATION_CURVE_HOLDERS = 50
+
 # Set up plotting style
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -19,10 +48,34 @@ sns.set_palette("husl")
 class MarketDominanceAnalyzer:
     """Analyze and visualize institutional market dominance"""
     
-    def __init__(self, data_file="../results/comprehensive_market_ownership_20250918_195445.csv"):
-        self.df = pd.read_csv(data_file)
+    def __init__(self, data_file="../results/comprehensive_market_ownership_20250918_195445.csv",
+                 usecols=OWNERSHIP_COLUMNS, interactive=None,
+                 dpi=150, output_format='png', figsize=(16, 20)):
+        # Only show figures on screen when a display is available, unless told otherwise
+        self.interactive = not HEADLESS if interactive is None else interactive
+        # Raster resolution for PNG output; 'pdf' and 'svg' are written as vectors instead
+        self.dpi = dpi
+        self.output_format = output_format
+        # Size of the six-panel comprehensive figure; 16x20 in at 150 dpi is still poster-sized
+        self.figsize = figsize
+        
+        # Typed load of just the used columns, served from the Parquet copy or the parsed-CSV
+        # cache when one is current; the category names make filters and groupby work on codes
+        self.df = load_ownership_data(data_file, columns=usecols)
         self.total_companies = self.df['ticker'].nunique()
         self.total_records = len(self.df)
+        # One row per (ticker, holder) pair: repeat filings for the same position would
+        # otherwise inflate presence counts. Share totals still come from the full frame.
+        self._pairs = self.df[['ticker', 'holder_name']].drop_duplicates().reset_index(drop=True)
+        
+        # Holder x ticker incidence matrix built once; every plot and report reads its rows
+        holders, tickers, self._presence = presence_matrix(self._pairs)
+        self._holder_index = pd.Index(holders)
+        self._ticker_index = pd.Index(tickers)
+        # Companies per holder, most first with ties in order of first appearance
+        self._holder_counts = value_counts_first_seen(self._pairs['holder_name'])
+        # Market presence (% of companies) per holder, shared by the charts, HHI and export
+        self._holder_pct = self._holder_counts / self.total_companies * 100
         
         print(f"📊 INSTITUTIONAL MARKET DOMINANCE ANALYSIS")
         print(f"=" * 60)
@@ -34,7 +87,7 @@ class MarketDominanceAnalyzer:
         """Create comprehensive analysis with visualizations"""
         
         # Set up the figure with subplots
-        fig = plt.figure(figsize=(20, 24))
+        fig = plt.figure(figsize=self.figsize)
         fig.suptitle('INSTITUTIONAL DOMINANCE OF AMERICAN STOCK MARKET\nComprehensive Analysis of 438 Major Companies', 
                      fontsize=20, fontweight='bold', y=0.98)
         
@@ -57,26 +110,51 @@ class MarketDominanceAnalyzer:
         self._plot_concentration_metrics(fig)
         
         plt.tight_layout()
-        plt.subplots_adjust(top=0.95)
+        plt.subplots_adjust(top=0.92)
         
         # Save the comprehensive analysis
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"institutional_dominance_analysis_{timestamp}.png"
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        filename = self._save_figure(fig, "institutional_dominance_analysis")
         print(f"💾 Comprehensive analysis saved to: {filename}")
         
-        plt.show()
+        if self.interactive:
+            plt.show()
+        plt.close(fig)
         
         # Generate detailed statistics
         self._generate_detailed_statistics()
     
+    def _holder_mask(self, holder):
+        """Boolean mask over the ticker index for the companies `holder` holds"""
+        return holder_row(self._holder_index, self._presence, holder)
+    
+    def _holder_rows(self, holders):
+        """Presence-matrix rows for `holders` in order, all False for holders not in the data"""
+        rows = np.zeros((len(holders), self._presence.shape[1]), dtype=bool)
+        idx = self._holder_index.get_indexer(holders)
+        rows[idx >= 0] = self._presence[idx[idx >= 0]]
+        return rows
+    
+    def _save_figure(self, fig, name):
+        """Save `fig` as a timestamped file in the configured format and return its name"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"{name}_{timestamp}.{self.output_format}"
+        
+        if self.output_format in ('pdf', 'svg'):
+            # Vector output costs per drawn element rather than per pixel; dpi only sets the
+            # resolution of the rasterized heatmap and histogram bars embedded in it
+            fig.savefig(filename, dpi=self.dpi, bbox_inches='tight')
+        else:
+            # zlib level 6 encodes much faster than the default 9 for nearly the same size
+            fig.savefig(filename, dpi=self.dpi, bbox_inches='tight',
+                        pil_kwargs={'compress_level': 6})
+        return filename
+    
     def _plot_market_presence(self, fig):
         """Plot institutional market presence across companies"""
         ax1 = fig.add_subplot(3, 2, 1)
         
         # Calculate market presence
-        holder_presence = self.df['holder_name'].value_counts()
-        percentages = (holder_presence / self.total_companies * 100).round(1)
+        percentages = self._holder_pct.round(1)
         
         # Create horizontal bar chart
         bars = ax1.barh(range(len(percentages)), percentages.values, 
@@ -89,9 +167,8 @@ class MarketDominanceAnalyzer:
         ax1.set_title('Institutional Market Presence\n(% of 438 Companies)', fontsize=14, fontweight='bold')
         
         # Add percentage labels on bars
-        for i, (bar, pct) in enumerate(zip(bars, percentages.values)):
-            ax1.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2, 
-                    f'{pct:.1f}%', va='center', fontsize=9, fontweight='bold')
+        ax1.bar_label(bars, labels=[f'{pct:.1f}%' for pct in percentages.values],
+                      padding=3, fontsize=9, fontweight='bold')
         
         ax1.grid(axis='x', alpha=0.3)
         ax1.set_xlim(0, 100)
@@ -101,13 +178,13 @@ class MarketDominanceAnalyzer:
         ax2 = fig.add_subplot(3, 2, 2)
         
         # Calculate Big 2 presence
-        vanguard_companies = set(self.df[self.df['holder_name'] == 'Vanguard Group']['ticker'])
-        blackrock_companies = set(self.df[self.df['holder_name'] == 'BlackRock']['ticker'])
+        vanguard_companies = self._holder_mask('Vanguard Group')
+        blackrock_companies = self._holder_mask('BlackRock')
         
-        both_companies = len(vanguard_companies & blackrock_companies)
-        vanguard_only = len(vanguard_companies - blackrock_companies)
-        blackrock_only = len(blackrock_companies - vanguard_companies)
-        neither = self.total_companies - len(vanguard_companies | blackrock_companies)
+        both_companies = int((vanguard_companies & blackrock_companies).sum())
+        vanguard_only = int((vanguard_companies & ~blackrock_companies).sum())
+        blackrock_only = int((blackrock_companies & ~vanguard_companies).sum())
+        neither = self.total_companies - int((vanguard_companies | blackrock_companies).sum())
         
         # Create pie chart
         sizes = [both_companies, vanguard_only, blackrock_only, neither]
@@ -133,7 +210,7 @@ class MarketDominanceAnalyzer:
         ax3 = fig.add_subplot(3, 2, 3)
         
         # Calculate total shares held (where data available)
-        shares_by_holder = self.df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
+        shares_by_holder = self.df.groupby('holder_name', observed=True)['shares'].sum().sort_values(ascending=False)
         valid_shares = shares_by_holder[shares_by_holder > 0].head(8)
         
         # Convert to billions for readability
@@ -149,9 +226,8 @@ class MarketDominanceAnalyzer:
         ax3.set_title('Total Share Holdings by Institution\n(Where Data Available)', fontsize=14, fontweight='bold')
         
         # Add value labels on bars
-        for bar, value in zip(bars, shares_billions.values):
-            ax3.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5,
-                    f'{value:.1f}B', ha='center', va='bottom', fontsize=9, fontweight='bold')
+        ax3.bar_label(bars, labels=[f'{value:.1f}B' for value in shares_billions.values],
+                      padding=3, fontsize=9, fontweight='bold')
         
         ax3.grid(axis='y', alpha=0.3)
     
@@ -163,22 +239,16 @@ class MarketDominanceAnalyzer:
         institutions = ['Vanguard Group', 'BlackRock', 'State Street', 'Fidelity', 
                        'T. Rowe Price', 'JPMorgan', 'Capital Group']
         
-        overlap_matrix = np.zeros((len(institutions), len(institutions)))
-        
-        for i, inst1 in enumerate(institutions):
-            for j, inst2 in enumerate(institutions):
-                if i != j:
-                    companies1 = set(self.df[self.df['holder_name'] == inst1]['ticker'])
-                    companies2 = set(self.df[self.df['holder_name'] == inst2]['ticker'])
-                    overlap = len(companies1 & companies2)
-                    overlap_matrix[i][j] = overlap
+        # All pairwise overlaps from one product of the institutions' presence rows
+        overlap_matrix = overlap_counts(self._holder_rows(institutions)).astype(float)
+        np.fill_diagonal(overlap_matrix, 0)
         
         # Create heatmap
         sns.heatmap(overlap_matrix, 
                    xticklabels=[inst.split()[0] for inst in institutions],
                    yticklabels=[inst.split()[0] for inst in institutions],
                    annot=True, fmt='.0f', cmap='Reds', ax=ax4,
-                   cbar_kws={'label': 'Shared Companies'})
+                   cbar_kws={'label': 'Shared Companies'}, rasterized=True)
         
         ax4.set_title('Cross-Ownership Network\n(Shared Company Holdings)', fontsize=14, fontweight='bold')
         ax4.set_xlabel('Institution', fontsize=12)
@@ -189,25 +259,29 @@ class MarketDominanceAnalyzer:
         ax5 = fig.add_subplot(3, 2, 5)
         
         # Simulate sector data (in real implementation, you'd have sector info)
-        # For demonstration, categorize by ticker patterns
-        sectors = self._categorize_companies_by_sector()
-        
-        sector_data = []
-        for sector, companies in sectors.items():
-            sector_df = self.df[self.df['ticker'].isin(companies)]
-            if not sector_df.empty:
-                vanguard_presence = len(sector_df[sector_df['holder_name'] == 'Vanguard Group']['ticker'].unique())
-                blackrock_presence = len(sector_df[sector_df['holder_name'] == 'BlackRock']['ticker'].unique())
-                total_sector_companies = len(companies)
-                
-                sector_data.append({
-                    'Sector': sector,
-                    'Vanguard': vanguard_presence / total_sector_companies * 100,
-                    'BlackRock': blackrock_presence / total_sector_companies * 100,
-                    'Companies': total_sector_companies
-                })
-        
-        sector_df = pd.DataFrame(sector_data)
+        # For demonstration, categorize by known tickers
+        ticker_to_sector = self._ticker_to_sector
+        
+        vanguard_companies = self._holder_mask('Vanguard Group')
+        blackrock_companies = self._holder_mask('BlackRock')
+        
+        # Sector code for every ticker column (-1 outside the listed sectors), then per-sector
+        # company counts and Big 2 holdings as bincounts instead of a loop over sectors
+        sector_names = pd.Index(list(dict.fromkeys(ticker_to_sector.values())))
+        sector_codes = sector_names.get_indexer(self._ticker_index.map(ticker_to_sector))
+        in_sector = sector_codes >= 0
+        sector_codes = sector_codes[in_sector]
+        
+        companies = np.bincount(sector_codes, minlength=len(sector_names))
+        vanguard_presence = np.bincount(sector_codes, weights=vanguard_companies[in_sector], minlength=len(sector_names))
+        blackrock_presence = np.bincount(sector_codes, weights=blackrock_companies[in_sector], minlength=len(sector_names))
+        
+        sector_df = pd.DataFrame({
+            'Sector': sector_names,
+            'Vanguard': vanguard_presence / companies * 100,
+            'BlackRock': blackrock_presence / companies * 100,
+            'Companies': companies
+        })
         
         x = np.arange(len(sector_df))
         width = 0.35
@@ -233,20 +307,12 @@ class MarketDominanceAnalyzer:
         ax6 = fig.add_subplot(3, 2, 6)
         
         # Calculate concentration ratios
-        holder_counts = self.df['holder_name'].value_counts()
-        
-        # Calculate cumulative market presence
-        cumulative_presence = []
-        cumulative_labels = []
+        holder_counts = self._holder_counts
         
-        running_companies = set()
-        for i, (holder, count) in enumerate(holder_counts.items()):
-            holder_companies = set(self.df[self.df['holder_name'] == holder]['ticker'])
-            running_companies.update(holder_companies)
-            
-            cumulative_pct = len(running_companies) / self.total_companies * 100
-            cumulative_presence.append(cumulative_pct)
-            cumulative_labels.append(f"Top {i+1}")
+        # Calculate cumulative market presence: a running OR down the top holders' presence rows
+        top_holders = holder_counts.index[:CONCENTRATION_CURVE_HOLDERS]
+        covered = np.logical_or.accumulate(self._holder_rows(top_holders), axis=0)
+        cumulative_presence = covered.sum(axis=1) / self.total_companies * 100
         
         # Plot cumulative concentration
         ax6.plot(range(1, len(cumulative_presence) + 1), cumulative_presence, 
@@ -274,92 +340,83 @@ class MarketDominanceAnalyzer:
         ax6.legend()
         ax6.set_ylim(0, 105)
     
-    def _categorize_companies_by_sector(self):
-        """Categorize companies by sector (simplified)"""
-        # Simplified sector categorization based on ticker patterns and known companies
-        sectors = {
-            'Technology': ['AAPL', 'MSFT', 'GOOGL', 'GOOG', 'AMZN', 'NVDA', 'META', 'NFLX', 
-                          'ADBE', 'CRM', 'ORCL', 'IBM', 'CSCO', 'INTC', 'AMD', 'QCOM', 'AVGO'],
-            'Financial': ['JPM', 'BAC', 'WFC', 'GS', 'MS', 'C', 'BLK', 'SPGI', 'V', 'MA', 'AXP'],
-            'Healthcare': ['UNH', 'JNJ', 'PFE', 'ABBV', 'LLY', 'MRK', 'TMO', 'ABT', 'DHR', 'BMY'],
-            'Consumer': ['WMT', 'HD', 'COST', 'LOW', 'TGT', 'DIS', 'NKE', 'SBUX', 'MCD', 'KO', 'PEP'],
-            'Energy': ['XOM', 'CVX', 'COP', 'EOG', 'SLB', 'PSX', 'VLO', 'MPC'],
-            'Industrial': ['BA', 'CAT', 'GE', 'HON', 'RTX', 'LMT', 'NOC', 'GD', 'DE', 'MMM']
-        }
-        
-        # Filter to only include companies we have data for
-        available_tickers = set(self.df['ticker'].unique())
-        filtered_sectors = {}
-        
-        for sector, tickers in sectors.items():
-            filtered_tickers = [t for t in tickers if t in available_tickers]
-            if filtered_tickers:
-                filtered_sectors[sector] = filtered_tickers
-        
-        return filtered_sectors
+    @cached_property
+    def _ticker_to_sector(self):
+        """Sector of each listed ticker present in the data, built once and reused"""
+        available_tickers = set(self._ticker_index)
+        return {ticker: sector for sector, tickers in SECTOR_TICKERS.items()
+                for ticker in tickers if ticker in available_tickers}
     
     def _generate_detailed_statistics(self):
         """Generate detailed statistical analysis"""
         
-        print(f"\n📊 DETAILED STATISTICAL ANALYSIS")
-        print(f"=" * 60)
+        # Collect the whole report and write it to stdout once
+        report = io.StringIO()
+        emit = partial(print, file=report)
+        
+        emit(f"\n📊 DETAILED STATISTICAL ANALYSIS")
+        emit(f"=" * 60)
         
         # Market presence statistics
-        holder_presence = self.df['holder_name'].value_counts()
-        print(f"\n🏛️  INSTITUTIONAL MARKET PRESENCE:")
+        holder_presence = self._holder_counts
+        emit(f"\n🏛️  INSTITUTIONAL MARKET PRESENCE:")
         for holder, count in holder_presence.items():
             percentage = count / self.total_companies * 100
-            print(f"   {holder}: {count}/{self.total_companies} companies ({percentage:.1f}%)")
+            emit(f"   {holder}: {count}/{self.total_companies} companies ({percentage:.1f}%)")
         
         # Big 2 detailed analysis
-        vanguard_companies = set(self.df[self.df['holder_name'] == 'Vanguard Group']['ticker'])
-        blackrock_companies = set(self.df[self.df['holder_name'] == 'BlackRock']['ticker'])
-        both_companies = vanguard_companies & blackrock_companies
-        
-        print(f"\n🎯 BIG 2 DETAILED ANALYSIS:")
-        print(f"   Vanguard presence: {len(vanguard_companies)} companies ({len(vanguard_companies)/self.total_companies*100:.1f}%)")
-        print(f"   BlackRock presence: {len(blackrock_companies)} companies ({len(blackrock_companies)/self.total_companies*100:.1f}%)")
-        print(f"   Both institutions: {len(both_companies)} companies ({len(both_companies)/self.total_companies*100:.1f}%)")
-        print(f"   Combined reach: {len(vanguard_companies | blackrock_companies)} companies ({len(vanguard_companies | blackrock_companies)/self.total_companies*100:.1f}%)")
+        vanguard_count = int(self._holder_mask('Vanguard Group').sum())
+        blackrock_count = int(self._holder_mask('BlackRock').sum())
+        big2_rows = self._holder_rows(['Vanguard Group', 'BlackRock'])
+        both_count = int(big2_rows.all(axis=0).sum())
+        combined_count = int(big2_rows.any(axis=0).sum())
+        
+        emit(f"\n🎯 BIG 2 DETAILED ANALYSIS:")
+        emit(f"   Vanguard presence: {vanguard_count} companies ({vanguard_count/self.total_companies*100:.1f}%)")
+        emit(f"   BlackRock presence: {blackrock_count} companies ({blackrock_count/self.total_companies*100:.1f}%)")
+        emit(f"   Both institutions: {both_count} companies ({both_count/self.total_companies*100:.1f}%)")
+        emit(f"   Combined reach: {combined_count} companies ({combined_count/self.total_companies*100:.1f}%)")
         
         # Share holdings analysis
-        shares_analysis = self.df.groupby('holder_name')['shares'].agg(['sum', 'count', 'mean']).sort_values('sum', ascending=False)
+        shares_analysis = self.df.groupby('holder_name', observed=True)['shares'].agg(['sum', 'count', 'mean']).sort_values('sum', ascending=False)
         shares_analysis = shares_analysis[shares_analysis['sum'] > 0]
         
-        print(f"\n💰 SHARE HOLDINGS ANALYSIS:")
-        print(f"   Total shares tracked: {shares_analysis['sum'].sum():,.0f}")
+        emit(f"\n💰 SHARE HOLDINGS ANALYSIS:")
+        emit(f"   Total shares tracked: {shares_analysis['sum'].sum():,.0f}")
         for holder, data in shares_analysis.iterrows():
-            print(f"   {holder}:")
-            print(f"      Total shares: {data['sum']:,.0f}")
-            print(f"      Positions with share data: {data['count']}")
-            print(f"      Average position size: {data['mean']:,.0f} shares")
+            emit(f"   {holder}:")
+            emit(f"      Total shares: {data['sum']:,.0f}")
+            emit(f"      Positions with share data: {data['count']}")
+            emit(f"      Average position size: {data['mean']:,.0f} shares")
         
         # Concentration ratios
-        print(f"\n📈 MARKET CONCENTRATION RATIOS:")
+        emit(f"\n📈 MARKET CONCENTRATION RATIOS:")
         
         # CR1, CR2, CR4, CR8 (concentration ratios)
         top_institutions = holder_presence.head(8)
-        cumulative_companies = set()
         
-        for i, (holder, count) in enumerate(top_institutions.items(), 1):
-            holder_companies = set(self.df[self.df['holder_name'] == holder]['ticker'])
-            cumulative_companies.update(holder_companies)
-            cr_ratio = len(cumulative_companies) / self.total_companies * 100
-            
-            if i in [1, 2, 4, 8]:
-                print(f"   CR{i} (Top {i} institutions): {cr_ratio:.1f}%")
+        # Running OR over the top holders' rows of the presence matrix: row k covers the top k+1
+        covered = np.logical_or.accumulate(self._holder_rows(top_institutions.index), axis=0)
+        cr_ratios = covered.sum(axis=1) / self.total_companies * 100
+        
+        for i in [1, 2, 4, 8]:
+            if i <= len(cr_ratios):
+                emit(f"   CR{i} (Top {i} institutions): {cr_ratios[i - 1]:.1f}%")
         
         # Herfindahl-Hirschman Index (HHI) calculation
-        market_shares = (holder_presence / self.total_companies * 100) ** 2
-        hhi = market_shares.sum()
+        market_shares = self._holder_pct.to_numpy()
+        hhi = float(market_shares @ market_shares)
         
-        print(f"   Herfindahl-Hirschman Index (HHI): {hhi:.0f}")
+        emit(f"   Herfindahl-Hirschman Index (HHI): {hhi:.0f}")
         if hhi > 2500:
-            print(f"   ⚠️  HIGHLY CONCENTRATED MARKET (HHI > 2500)")
+            emit(f"   ⚠️  HIGHLY CONCENTRATED MARKET (HHI > 2500)")
         elif hhi > 1500:
-            print(f"   ⚠️  MODERATELY CONCENTRATED MARKET (1500 < HHI < 2500)")
+            emit(f"   ⚠️  MODERATELY CONCENTRATED MARKET (1500 < HHI < 2500)")
         else:
-            print(f"   ✅ COMPETITIVE MARKET (HHI < 1500)")
+            emit(f"   ✅ COMPETITIVE MARKET (HHI < 1500)")
+        
+        sys.stdout.write(report.getvalue())
+        sys.stdout.flush()
     
     def create_summary_dashboard(self):
         """Create a summary dashboard with key metrics"""
@@ -369,8 +426,7 @@ class MarketDominanceAnalyzer:
                      fontsize=18, fontweight='bold')
         
         # 1. Top 5 Institution Market Share
-        holder_presence = self.df['holder_name'].value_counts().head(5)
-        percentages = holder_presence / self.total_companies * 100
+        percentages = self._holder_pct.head(5)
         
         bars1 = ax1.bar(range(len(percentages)), percentages.values, 
                        color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7'])
@@ -380,12 +436,11 @@ class MarketDominanceAnalyzer:
         ax1.set_title('Top 5 Institutions - Market Presence')
         ax1.grid(axis='y', alpha=0.3)
         
-        for bar, pct in zip(bars1, percentages.values):
-            ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                    f'{pct:.1f}%', ha='center', va='bottom', fontweight='bold')
+        ax1.bar_label(bars1, labels=[f'{pct:.1f}%' for pct in percentages.values],
+                      padding=3, fontweight='bold')
         
         # 2. Big 2 vs Others
-        big2_companies = len(set(self.df[self.df['holder_name'].isin(['Vanguard Group', 'BlackRock'])]['ticker']))
+        big2_companies = int(self._holder_rows(['Vanguard Group', 'BlackRock']).any(axis=0).sum())
         other_companies = self.total_companies - big2_companies
         
         sizes = [big2_companies, other_companies]
@@ -396,9 +451,13 @@ class MarketDominanceAnalyzer:
         ax2.set_title('Market Control: Big 2 vs Others')
         
         # 3. Holdings per company distribution
-        holdings_per_company = self.df.groupby('ticker').size()
-        ax3.hist(holdings_per_company, bins=range(1, holdings_per_company.max() + 2), 
-                alpha=0.7, color='#45B7D1', edgecolor='black')
+        # Holders per ticker, then companies per holder count: two bincounts over the factor codes
+        ticker_codes, _ = pd.factorize(self._pairs['ticker'])
+        holders_per_company = np.bincount(ticker_codes[ticker_codes >= 0])
+        companies_per_count = np.bincount(holders_per_company)
+        # Unit-wide bars starting at each count, as hist drew them with bins=range(1, max + 2)
+        ax3.bar(np.arange(1, len(companies_per_count)), companies_per_count[1:], width=1, align='edge',
+                alpha=0.7, color='#45B7D1', edgecolor='black', rasterized=True)
         ax3.set_xlabel('Number of Institutional Holders')
         ax3.set_ylabel('Number of Companies')
         ax3.set_title('Distribution of Institutional Holdings per Company')
@@ -426,35 +485,38 @@ class MarketDominanceAnalyzer:
         plt.tight_layout()
         
         # Save dashboard
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        dashboard_filename = f"market_dominance_dashboard_{timestamp}.png"
-        plt.savefig(dashboard_filename, dpi=300, bbox_inches='tight')
+        dashboard_filename = self._save_figure(fig, "market_dominance_dashboard")
         print(f"💾 Dashboard saved to: {dashboard_filename}")
         
-        plt.show()
+        if self.interactive:
+            plt.show()
+        plt.close(fig)
     
-    def export_analysis_data(self):
-        """Export processed analysis data"""
+    def export_analysis_data(self, export_format='csv'):
+        """Export processed analysis data as 'csv' or zstd 'parquet' files, written with PyArrow"""
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        market_presence_file = f"market_presence_analysis_{timestamp}.{export_format}"
+        share_holdings_file = f"share_holdings_analysis_{timestamp}.{export_format}"
+        company_analysis_file = f"company_institutional_analysis_{timestamp}.{export_format}"
         
         # 1. Market presence summary
-        holder_presence = self.df['holder_name'].value_counts()
+        holder_presence = self._holder_counts
         market_presence_df = pd.DataFrame({
             'Institution': holder_presence.index,
             'Companies_Held': holder_presence.values,
-            'Market_Presence_Percent': (holder_presence / self.total_companies * 100).round(2)
+            'Market_Presence_Percent': self._holder_pct.round(2)
         })
-        market_presence_df.to_csv(f"market_presence_analysis_{timestamp}.csv", index=False)
+        export_frame(market_presence_df, market_presence_file)
         
         # 2. Share holdings summary
-        shares_summary = self.df.groupby('holder_name')['shares'].agg(['sum', 'count', 'mean']).reset_index()
+        shares_summary = self.df.groupby('holder_name', observed=True)['shares'].agg(['sum', 'count', 'mean']).reset_index()
         shares_summary.columns = ['Institution', 'Total_Shares', 'Positions_Count', 'Avg_Position_Size']
         shares_summary = shares_summary[shares_summary['Total_Shares'] > 0].sort_values('Total_Shares', ascending=False)
-        shares_summary.to_csv(f"share_holdings_analysis_{timestamp}.csv", index=False)
+        export_frame(shares_summary, share_holdings_file)
         
         # 3. Company-level analysis
-        company_analysis = self.df.groupby(['ticker', 'company_name']).agg({
+        company_analysis = self.df.groupby(['ticker', 'company_name'], observed=True).agg({
             'holder_name': 'count',
             'shares': 'sum',
             'percent_owned': 'sum'
@@ -462,12 +524,12 @@ class MarketDominanceAnalyzer:
         company_analysis.columns = ['Ticker', 'Company_Name', 'Institutional_Holders_Count', 
                                   'Total_Institutional_Shares', 'Total_Institutional_Percent']
         company_analysis = company_analysis.sort_values('Institutional_Holders_Count', ascending=False)
-        company_analysis.to_csv(f"company_institutional_analysis_{timestamp}.csv", index=False)
+        export_frame(company_analysis, company_analysis_file)
         
         print(f"\n💾 ANALYSIS DATA EXPORTED:")
-        print(f"   Market presence analysis: market_presence_analysis_{timestamp}.csv")
-        print(f"   Share holdings analysis: share_holdings_analysis_{timestamp}.csv")
-        print(f"   Company-level analysis: company_institutional_analysis_{timestamp}.csv")
+        print(f"   Market presence analysis: {market_presence_file}")
+        print(f"   Share holdings analysis: {share_holdings_file}")
+        print(f"   Company-level analysis: {company_analysis_file}")
 
 def main():
     """Main analysis execution"""
@@ -0,0 +1,229 @@
+"""
+Pieces shared by the SEC scrapers: request pacing, the company thread pool, the on-disk
+HTTP cache, the ticker -> CIK file and the keyword prefilter for institution patterns.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+import orjson
+import requests
+
+SEC_MAX_REQUESTS_PER_SECOND = 10
+
+# SEC's ticker -> CIK file is kept on disk between runs and refreshed once a day
+COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+CIK_CACHE_PATH = os.path.expanduser("~/.cache/sec_scraper/company_tickers.json")
+CIK_CACHE_TTL = 24 * 3600
+
+# A literal that every match of an institution's patterns contains. A quick substring check
+# skips institutions the filing never mentions, T. Rowe's slow 't'-anchored scan included.
+INSTITUTION_KEYWORDS = {
+    'Vanguard Group': ('vanguard',),
+    'BlackRock': ('blackrock',),
+    'State Street': ('street',),
+    'Fidelity': ('fidelity', 'fmr'),
+    'T. Rowe Price': ('rowe',),
+    'Berkshire Hathaway': ('berkshire',),
+    'JPMorgan': ('morgan',),
+    'Capital Group': ('capital',),
+    'Wellington Management': ('wellington',),
+    'Invesco': ('invesco',),
+    'Northern Trust': ('northern',),
+    'Bank of New York Mellon': ('mellon',),
+    'Goldman Sachs Asset Management': ('goldman', 'gsam'),
+    'Morgan Stanley Investment Management': ('stanley',),
+    'Dimensional Fund Advisors': ('dimensional',),
+}
+
+class SecRateLimiter:
+    """Spaces requests from all worker threads to stay under SEC's rate limit"""
+
+    def __init__(self, max_requests_per_second: float = SEC_MAX_REQUESTS_PER_SECOND):
+        self._interval = 1.0 / max_requests_per_second
+        self._lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def wait(self):
+        """Block until the calling thread may send its request"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+@contextlib.contextmanager
+def company_pool(max_workers: int) -> Iterator[ThreadPoolExecutor]:
+    """Thread pool for fetching companies. If the block fails or is interrupted, the companies
+    still queued are cancelled, so only the in-flight ones finish, not the rest of the list."""
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield pool
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+def write_cache_file(path: str, data: bytes):
+    """Write a cache file beside `path` and swap it in, so a concurrent run never reads half a file"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # Caches only save requests on the next run
+
+class HttpCache:
+    """SEC response bodies on disk, keyed by URL. Each entry keeps the response's ETag and
+    Last-Modified, so an entry older than its ttl is revalidated with a conditional GET and
+    only downloaded again when SEC reports a change."""
+
+    def __init__(self, directory: Union[str, os.PathLike]):
+        self.directory = pathlib.Path(directory)
+
+    def _paths(self, url: str) -> Tuple[pathlib.Path, pathlib.Path]:
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def read_meta(self, url: str) -> Optional[dict]:
+        """Metadata of the cached copy of `url`, or None when there is no usable entry"""
+        body_path, meta_path = self._paths(url)
+        if not body_path.exists():
+            return None
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def fresh(self, url: str, ttl: Optional[float] = None) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Cached (body, encoding) while the entry is younger than `ttl` seconds (None never
+        expires); None when it is missing or due for revalidation"""
+        meta = self.read_meta(url)
+        if meta is None or (ttl is not None and time.time() - meta.get("fetched_at", 0) >= ttl):
+            return None
+        try:
+            return self._paths(url)[0].read_bytes(), meta.get("encoding")
+        except OSError:
+            return None
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for the cached copy of `url`; empty without one"""
+        meta = self.read_meta(url) or {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def not_modified(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """The cached (body, encoding) after a 304, restamped as freshly fetched"""
+        meta = self.read_meta(url)
+        if meta is None:
+            return None
+        try:
+            body = self._paths(url)[0].read_bytes()
+        except OSError:
+            return None
+        meta["fetched_at"] = time.time()
+        self._write_meta(url, meta)
+        return body, meta.get("encoding")
+
+    def get(
+        self,
+        url: str,
+        fetch: Callable[[Dict[str, str]], requests.Response],
+        ttl: Optional[float] = None,
+    ) -> Tuple[bytes, Optional[str]]:
+        """(body, encoding) for `url`: from the cache while fresh, otherwise from
+        `fetch(conditional_headers)`, whose response is stored unless it is a 304"""
+        cached = self.fresh(url, ttl)
+        if cached is not None:
+            return cached
+        response = fetch(self.validators(url))
+        if response.status_code == 304:
+            cached = self.not_modified(url)
+            if cached is not None:
+                return cached
+        self.store(url, response.content, response)
+        return response.content, response.encoding
+
+    def store(self, url: str, body: bytes, response: requests.Response):
+        """Cache a complete response body"""
+        with self.writer(url, response) as write:
+            write(body)
+
+    @contextlib.contextmanager
+    def writer(self, url: str, response: requests.Response) -> Iterator[Callable[[bytes], object]]:
+        """Yield a function that appends body chunks to a new entry for `url`. The body goes to
+        a temp file and is only swapped in, followed by its metadata, once it is complete."""
+        body_path, _ = self._paths(url)
+        tmp_path = body_path.with_name(body_path.name + self._tmp_suffix())
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            f = open(tmp_path, 'wb')
+        except OSError:
+            yield lambda chunk: None  # Uncacheable: the cache only saves a download next run
+            return
+
+        try:
+            with f:
+                yield f.write
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)  # Failed download: leave any old entry alone
+            raise
+
+        try:
+            os.replace(tmp_path, body_path)
+        except OSError:
+            return  # The cache only saves a download next run
+        self._write_meta(url, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "fetched_at": time.time(),
+        })
+
+    def _write_meta(self, url: str, meta: dict):
+        _, meta_path = self._paths(url)
+        tmp_path = meta_path.with_name(meta_path.name + self._tmp_suffix())
+        try:
+            tmp_path.write_text(json.dumps(meta))
+            os.replace(tmp_path, meta_path)
+        except OSError:
+            pass  # The cache only saves a download next run
+
+    @staticmethod
+    def _tmp_suffix() -> str:
+        # Per process and thread, so concurrent writers never share a temp file
+        return f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+def load_cik_map(sec_get: Callable[..., requests.Response]) -> Dict[str, str]:
+    """Upper-case ticker -> zero-padded CIK from SEC's company_tickers.json, read from the disk
+    cache while it is under a day old and downloaded with `sec_get` otherwise"""
+    data = None
+    try:
+        if time.time() - os.path.getmtime(CIK_CACHE_PATH) < CIK_CACHE_TTL:
+            with open(CIK_CACHE_PATH, 'rb') as f:
+                data = orjson.loads(f.read())
+    except (OSError, ValueError):
+        pass  # Missing or unreadable cache: download below
+
+    if data is None:
+        response = sec_get(COMPANY_TICKERS_URL, timeout=10)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        write_cache_file(CIK_CACHE_PATH, response.content)  # Already JSON; no need to serialize it again
+
+    return {record['ticker'].upper(): str(record['cik_str']).zfill(10) for record in data.values()}
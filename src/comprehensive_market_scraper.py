@@ -4,24 +4,143 @@ Comprehensive American Market Ownership Scraper
 Dynamically fetches full S&P 500 and processes 500+ companies for complete market analysis.
 """
 
+import os
+import orjson
 import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import lxml.html
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+import _sec_common
+from _sec_common import SecRateLimiter, company_pool, load_cik_map, write_cache_file
+
+# Companies fetched concurrently; SEC requests are paced below its 10 requests/second limit
+MAX_WORKERS = 8
+
+# Holder records are buffered this many companies at a time, then written out as one Arrow batch
+BATCH_COMPANIES = 25
+
+# Print a line per company; set to False on long runs to keep just the progress checkpoints
+VERBOSE = True
+
+# Arrow layout of the collected records. holder_name only ever takes a handful of values, so it is
+# dictionary-encoded; percentages stay float64 so saved values read back exactly as parsed.
+OWNERSHIP_SCHEMA = pa.schema([
+    ('ticker', pa.string()),
+    ('company_name', pa.string()),
+    ('holder_name', pa.dictionary(pa.int32(), pa.string())),
+    ('shares', pa.int64()),
+    ('percent_owned', pa.float64()),
+    ('filing_date', pa.string()),
+])
+
+# Filings are downloaded in pieces of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Latest DEF 14A URL per CIK, with the validators of the submissions JSON it came from. Later
+# runs send them back and reuse the URL when SEC answers 304 Not Modified.
+FILING_URL_CACHE_PATH = os.path.expanduser("~/.cache/sec_scraper/def14a_urls.json")
+
+def _filing_pattern(pattern: str) -> re.Pattern:
+    """Compile a pattern for raw filing bytes. Bytes \\s only knows ASCII whitespace, so it is
+    widened to also take the no-break spaces (UTF-8 or Latin-1) that str patterns matched."""
+    return re.compile(pattern.replace(r'\s', r'(?:\s|\xc2?\xa0)').encode())
+
+# Top institutional investors with optimized patterns, compiled once. They are matched against
+# the lowercased filing one pattern at a time: each starts with a literal, which re scans for
+# far faster than it can walk a single combined alternation or an IGNORECASE pattern.
+MAJOR_INSTITUTIONS = {
+    institution: [_filing_pattern(pattern) for pattern in patterns]
+    for institution, patterns in {
+        'Vanguard Group': [r'vanguard\s+group', r'the\s+vanguard\s+group'],
+        'BlackRock': [r'blackrock,?\s+inc', r'blackrock\s+fund'],
+        'State Street': [r'state\s+street\s+corp', r'state\s+street\s+corporation'],
+        'Fidelity': [r'fidelity\s+management', r'fmr\s+llc'],
+        'T. Rowe Price': [r't\.?\s*rowe\s+price'],
+        'Berkshire Hathaway': [r'berkshire\s+hathaway'],
+        'JPMorgan': [r'jpmorgan\s+chase', r'jp\s+morgan'],
+        'Capital Group': [r'capital\s+group', r'capital\s+research'],
+        'Wellington Management': [r'wellington\s+management'],
+        'Invesco': [r'invesco\s+ltd'],
+        'Northern Trust': [r'northern\s+trust'],
+        'Bank of New York Mellon': [r'bank\s+of\s+new\s+york\s+mellon', r'bny\s+mellon'],
+        'Goldman Sachs Asset Management': [r'goldman\s+sachs\s+asset', r'gsam'],
+        'Morgan Stanley Investment Management': [r'morgan\s+stanley\s+investment'],
+        'Dimensional Fund Advisors': [r'dimensional\s+fund'],
+    }.items()
+}
+# The shared keyword prefilter, as bytes to check against the raw filing
+INSTITUTION_KEYWORDS = {
+    institution: tuple(keyword.encode() for keyword in keywords)
+    for institution, keywords in _sec_common.INSTITUTION_KEYWORDS.items()
+}
+_RE_SHARES = _filing_pattern(r'(\d{1,3}(?:,\d{3}){1,4})')
+_RE_PERCENT = _filing_pattern(r'(\d{1,2}\.?\d*)\s*%')
+
+# holder_name in the returned DataFrame: one small integer code per row instead of a string
+HOLDER_DTYPE = pd.CategoricalDtype(categories=list(MAJOR_INSTITUTIONS))
+
 class ComprehensiveMarketScraper:
     """Comprehensive scraper for full American market analysis"""
     
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip, deflate',
         })
+        # Keep-alive connections for every worker, so TLS handshakes happen once per connection;
+        # transient SEC errors and 429s are retried with backoff
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._rate_limiter = SecRateLimiter()
+        self._cik_lock = threading.Lock()
+        self._filing_url_lock = threading.Lock()
+        self._filing_urls = None
+        self._filing_urls_dirty = False
+    
+    def _sec_get(
+        self,
+        url: str,
+        timeout: int,
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """GET an SEC URL, spacing requests from all worker threads to stay under SEC's rate limit"""
+        self._rate_limiter.wait()
+        return self.session.get(url, timeout=timeout, stream=stream, headers=headers)
+    
+    def _timed_company_holders(self, company: Tuple[str, str]) -> Tuple[List[Dict], float]:
+        """Worker-thread wrapper returning a company's holders and how long they took to fetch"""
+        company_start = time.time()
+        holders = self._get_company_institutional_holders(*company)
+        return holders, time.time() - company_start
         
-    def scrape_full_market(self, target_companies: int = 500) -> pd.DataFrame:
-        """Scrape ownership data from comprehensive market coverage"""
+    def scrape_full_market(
+        self,
+        target_companies: int = 500,
+        max_workers: int = MAX_WORKERS,
+        output_path: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Scrape ownership data from comprehensive market coverage
+        
+        Records are written out as Arrow batches every BATCH_COMPANIES companies, to a zstd
+        Parquet file at `output_path` when given (kept in memory otherwise), so at most one
+        batch of record dicts is alive at a time.
+        """
         
         print(f"🚀 COMPREHENSIVE AMERICAN MARKET OWNERSHIP SCRAPER")
         print(f"📊 Target: {target_companies} companies (Full S&P 500 + Major Companies)")
@@ -37,56 +156,92 @@ class ComprehensiveMarketScraper:
         if target_companies > 0 and target_companies < len(companies):
             companies = companies[:target_companies]
         
+        # Resolve CIKs for the whole list up front: tickers SEC has no CIK for are reported
+        # once here instead of being queued only to come back empty
+        cik_map = self._get_cik_map()
+        unknown_tickers = [ticker for ticker, _ in companies if ticker.upper() not in cik_map]
+        if unknown_tickers:
+            companies = [company for company in companies if company[0].upper() in cik_map]
+            shown = ', '.join(unknown_tickers[:10]) + (', ...' if len(unknown_tickers) > 10 else '')
+            print(f"⚠️  Skipping {len(unknown_tickers)} tickers with no SEC CIK: {shown}")
+        
         print(f"✅ Loaded {len(companies)} companies for processing\n")
         
         # Step 2: Process all companies with optimized progress tracking
-        all_ownership_data = []
+        pending_records = []
+        batches = []
+        writer = pq.ParquetWriter(output_path, OWNERSHIP_SCHEMA, compression='zstd') if output_path else None
+        total_records = 0
         successful_companies = 0
-        failed_companies = 0
+        failed_companies = len(unknown_tickers)
         
-        for i, (ticker, company_name) in enumerate(companies, 1):
-            print(f"--- {i}/{len(companies)}: {ticker} ({company_name}) ---")
-            
-            company_start = time.time()
-            holders = self._get_company_institutional_holders(ticker, company_name)
-            company_time = time.time() - company_start
-            
-            if holders:
-                all_ownership_data.extend(holders)
-                successful_companies += 1
-                print(f"✅ Found {len(holders)} institutional holders in {company_time:.1f}s")
-            else:
-                failed_companies += 1
-                print(f"⚠️  No institutional data found in {company_time:.1f}s")
-            
-            # Enhanced progress tracking for large scale
-            if i % 50 == 0 or i <= 10:
-                elapsed = time.time() - start_time
-                rate = i / elapsed if elapsed > 0 else 0
-                remaining_time = (len(companies) - i) / rate if rate > 0 else 0
+        try:
+            # Companies are fetched on a thread pool so their SEC round-trips overlap; map hands the
+            # results back in list order, so the progress output reads as it did serially
+            with company_pool(max_workers) as pool:
+                results = pool.map(self._timed_company_holders, companies)
+            
+                for i, ((ticker, company_name), (holders, company_time)) in enumerate(zip(companies, results), 1):
+                    if holders:
+                        pending_records.extend(holders)
+                        total_records += len(holders)
+                        successful_companies += 1
+                        outcome = f"✅ Found {len(holders)} institutional holders in {company_time:.1f}s"
+                    else:
+                        failed_companies += 1
+                        outcome = f"⚠️  No institutional data found in {company_time:.1f}s"
+            
+                    if VERBOSE:
+                        # Both lines in one write, so a line-buffered terminal flushes once per company
+                        print(f"--- {i}/{len(companies)}: {ticker} ({company_name}) ---\n{outcome}")
+            
+                    # Enhanced progress tracking for large scale
+                    if i % 50 == 0 or i <= 10:
+                        elapsed = time.time() - start_time
+                        rate = i / elapsed if elapsed > 0 else 0
+                        remaining_time = (len(companies) - i) / rate if rate > 0 else 0
                 
-                print(f"\n📊 MAJOR PROGRESS CHECKPOINT:")
-                print(f"   Processed: {i}/{len(companies)} companies ({i/len(companies)*100:.1f}%)")
-                print(f"   Success rate: {successful_companies}/{i} ({successful_companies/i*100:.1f}%)")
-                print(f"   Current rate: {rate*60:.1f} companies/min")
-                print(f"   Time elapsed: {elapsed/60:.1f} minutes")
-                print(f"   ETA: {remaining_time/60:.1f} minutes remaining")
-                print(f"   Records collected so far: {len(all_ownership_data)}")
-                print("="*60 + "\n")
-            elif i % 10 == 0:
-                elapsed = time.time() - start_time
-                rate = i / elapsed if elapsed > 0 else 0
-                remaining_time = (len(companies) - i) / rate if rate > 0 else 0
-                print(f"📈 Progress: {i}/{len(companies)} ({i/len(companies)*100:.1f}%) - ETA: {remaining_time/60:.1f} min\n")
-            
-            # Rate limiting to respect SEC guidelines
-            time.sleep(0.1)  # Faster rate for large scale
+                        print(f"\n📊 MAJOR PROGRESS CHECKPOINT:")
+                        print(f"   Processed: {i}/{len(companies)} companies ({i/len(companies)*100:.1f}%)")
+                        print(f"   Success rate: {successful_companies}/{i} ({successful_companies/i*100:.1f}%)")
+                        print(f"   Current rate: {rate*60:.1f} companies/min")
+                        print(f"   Time elapsed: {elapsed/60:.1f} minutes")
+                        print(f"   ETA: {remaining_time/60:.1f} minutes remaining")
+                        print(f"   Records collected so far: {total_records}")
+                        print("="*60 + "\n")
+                    elif i % 10 == 0:
+                        elapsed = time.time() - start_time
+                        rate = i / elapsed if elapsed > 0 else 0
+                        remaining_time = (len(companies) - i) / rate if rate > 0 else 0
+                        print(f"📈 Progress: {i}/{len(companies)} ({i/len(companies)*100:.1f}%) - ETA: {remaining_time/60:.1f} min\n")
+            
+                    if i % BATCH_COMPANIES == 0 or i == len(companies):
+                        if pending_records:
+                            batch = pa.RecordBatch.from_pylist(pending_records, schema=OWNERSHIP_SCHEMA)
+                            if writer:
+                                writer.write_batch(batch)
+                            else:
+                                batches.append(batch)
+                            pending_records = []
+        except BaseException:
+            # A failed run must not leave a truncated Parquet file behind
+            if writer:
+                writer.close()
+                os.remove(output_path)
+            raise
+        
+        if writer:
+            writer.close()
+        self._save_filing_url_cache()
         
         # Step 3: Generate comprehensive results
         total_time = time.time() - start_time
         
-        if all_ownership_data:
-            df = pd.DataFrame(all_ownership_data)
+        if total_records:
+            table = pq.read_table(output_path) if writer else pa.Table.from_batches(batches, schema=OWNERSHIP_SCHEMA)
+            df = table.to_pandas()
+            # Fixed codebook of the institutions searched for, whichever of them were found
+            df['holder_name'] = df['holder_name'].astype(HOLDER_DTYPE)
             
             print(f"\n🎉 COMPREHENSIVE MARKET ANALYSIS COMPLETE!")
             print(f"⏱️  Total processing time: {total_time/60:.1f} minutes ({total_time/3600:.1f} hours)")
@@ -99,6 +254,8 @@ class ComprehensiveMarketScraper:
             
             return df
         else:
+            if writer:
+                os.remove(output_path)
             print(f"❌ No ownership data collected in {total_time/60:.1f} minutes")
             return pd.DataFrame()
     
@@ -112,28 +269,33 @@ class ComprehensiveMarketScraper:
             response = self.session.get(url, timeout=20)
             response.raise_for_status()
             
-            # Parse the Wikipedia table
-            tables = pd.read_html(response.text)
-            sp500_df = tables[0]
+            # Read the Symbol and Security cells straight off the first wikitable's rows
+            parser = lxml.html.HTMLParser(encoding=response.encoding or 'utf-8')
+            tree = lxml.html.fromstring(response.content, parser=parser)
+            rows = tree.xpath('(//table[contains(@class, "wikitable")])[1]//tr[td]')
             
-            # Clean the data
+            # Clean the data, keeping the first row for a ticker listed twice
             companies = []
-            for _, row in sp500_df.iterrows():
+            seen_tickers = set()
+            for row in rows:
                 try:
-                    ticker = str(row.iloc[0]).replace('.', '-').strip().upper()
-                    name = str(row.iloc[1]).strip()
+                    cells = row.xpath('./td')
+                    ticker = cells[0].text_content().replace('.', '-').strip().upper()
+                    name = cells[1].text_content().strip()
                     
                     # Validate ticker format
                     if ticker and name and len(ticker) <= 6 and ticker.isalnum() or '-' in ticker:
-                        companies.append((ticker, name))
+                        if ticker not in seen_tickers:
+                            seen_tickers.add(ticker)
+                            companies.append((ticker, name))
                 except Exception:
                     continue
             
             print(f"✅ Successfully loaded {len(companies)} S&P 500 companies dynamically!")
             
-            # Add additional major companies for broader coverage
+            # Add additional major companies for broader coverage, skipping any already in the S&P 500
             additional_companies = self._get_additional_major_companies()
-            companies.extend(additional_companies)
+            companies.extend(company for company in additional_companies if company[0] not in seen_tickers)
             
             print(f"✅ Total companies for comprehensive analysis: {len(companies)}")
             return companies
@@ -363,26 +525,54 @@ class ComprehensiveMarketScraper:
     
     def _get_cik_fast(self, ticker: str) -> Optional[str]:
         """Fast CIK lookup with caching"""
-        if not hasattr(self, '_cik_cache'):
-            try:
-                url = "https://www.sec.gov/files/company_tickers.json"
-                response = self.session.get(url, timeout=10)
-                data = response.json()
-                
-                self._cik_cache = {}
-                for record in data.values():
-                    self._cik_cache[record['ticker'].upper()] = str(record['cik_str']).zfill(10)
-            except:
-                self._cik_cache = {}
+        return self._get_cik_map().get(ticker.upper())
+    
+    def _get_cik_map(self) -> Dict[str, str]:
+        """Upper-case ticker -> zero-padded CIK, loaded once"""
+        with self._cik_lock:  # First caller downloads the map; other workers wait for it
+            if not hasattr(self, '_cik_cache'):
+                try:
+                    self._cik_cache = load_cik_map(self._sec_get)
+                except:
+                    self._cik_cache = {}
         
-        return self._cik_cache.get(ticker.upper())
+        return self._cik_cache
+    
+    def _cached_filing_urls(self) -> Dict[str, dict]:
+        """DEF 14A URLs found on earlier runs, keyed by CIK; read from disk on first use"""
+        with self._filing_url_lock:
+            if self._filing_urls is None:
+                try:
+                    with open(FILING_URL_CACHE_PATH, 'rb') as f:
+                        self._filing_urls = orjson.loads(f.read())
+                except (OSError, ValueError):
+                    self._filing_urls = {}
+        return self._filing_urls
+    
+    def _save_filing_url_cache(self):
+        """Write the DEF 14A URL cache back to disk if this run added to it"""
+        with self._filing_url_lock:
+            if self._filing_urls_dirty:
+                write_cache_file(FILING_URL_CACHE_PATH, orjson.dumps(self._filing_urls))
+                self._filing_urls_dirty = False
     
     def _get_latest_filing_url_fast(self, cik: str) -> Optional[str]:
-        """Fast filing URL lookup"""
+        """Fast filing URL lookup. The submissions JSON is fetched conditionally, so a company
+        whose filings have not changed since the last run costs a body-less 304."""
         try:
+            cached = self._cached_filing_urls().get(cik)
+            headers = {}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+            
             url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
+            response = self._sec_get(url, timeout=10, headers=headers)
+            if response.status_code == 304 and cached:
+                return cached['url']
+            data = orjson.loads(response.content)
             
             filings = data.get('filings', {}).get('recent', {})
             forms = filings.get('form', [])
@@ -390,85 +580,79 @@ class ComprehensiveMarketScraper:
             primary_docs = filings.get('primaryDocument', [])
             
             # Find latest DEF 14A
+            filing_url = None
             for i, form in enumerate(forms):
                 if str(form).strip().upper() == 'DEF 14A':
                     acc_no = accessions[i].replace('-', '')
                     primary_doc = primary_docs[i] if i < len(primary_docs) else ""
                     
                     if primary_doc:
-                        return f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{acc_no}/{primary_doc}"
+                        filing_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{acc_no}/{primary_doc}"
+                        break
             
-            return None
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status_code == 200 and (etag or last_modified):
+                with self._filing_url_lock:
+                    self._filing_urls[cik] = {'url': filing_url, 'etag': etag, 'last_modified': last_modified}
+                    self._filing_urls_dirty = True
+            
+            return filing_url
         except:
             return None
     
-    def _download_filing_fast(self, url: str) -> Optional[str]:
-        """Fast filing download with timeout optimization"""
+    def _download_filing_fast(self, url: str) -> Optional[bytearray]:
+        """Fast filing download with timeout optimization. The raw bytes are read in chunks and
+        lowercased as they arrive, so a worker only ever holds one copy of the filing: everything
+        searched for is ASCII, and lowercasing leaves the digits and '%' signs read for data alone."""
         try:
-            response = self.session.get(url, timeout=20)
-            response.raise_for_status()
-            return response.text
+            with self._sec_get(url, timeout=20, stream=True) as response:
+                response.raise_for_status()
+                content_lower = bytearray()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    content_lower += chunk.lower()
+                return content_lower
         except:
             return None
     
-    def _extract_institutional_holders_fast(self, content: str, ticker: str, company_name: str) -> List[Dict]:
-        """Fast institutional holder extraction optimized for scale"""
-        
-        # Top institutional investors with optimized patterns
-        major_institutions = {
-            'Vanguard Group': [r'vanguard\s+group', r'the\s+vanguard\s+group'],
-            'BlackRock': [r'blackrock,?\s+inc', r'blackrock\s+fund'],
-            'State Street': [r'state\s+street\s+corp', r'state\s+street\s+corporation'],
-            'Fidelity': [r'fidelity\s+management', r'fmr\s+llc'],
-            'T. Rowe Price': [r't\.?\s*rowe\s+price'],
-            'Berkshire Hathaway': [r'berkshire\s+hathaway'],
-            'JPMorgan': [r'jpmorgan\s+chase', r'jp\s+morgan'],
-            'Capital Group': [r'capital\s+group', r'capital\s+research'],
-            'Wellington Management': [r'wellington\s+management'],
-            'Invesco': [r'invesco\s+ltd'],
-            'Northern Trust': [r'northern\s+trust'],
-            'Bank of New York Mellon': [r'bank\s+of\s+new\s+york\s+mellon', r'bny\s+mellon'],
-            'Goldman Sachs Asset Management': [r'goldman\s+sachs\s+asset', r'gsam'],
-            'Morgan Stanley Investment Management': [r'morgan\s+stanley\s+investment'],
-            'Dimensional Fund Advisors': [r'dimensional\s+fund'],
-        }
+    def _extract_institutional_holders_fast(self, content_lower: bytes, ticker: str, company_name: str) -> List[Dict]:
+        """Fast institutional holder extraction optimized for scale. Takes the lowercased filing
+        from _download_filing_fast."""
         
         holders = []
-        content_lower = content.lower()
+        filing_date = datetime.now().strftime('%Y-%m-%d')
         
-        for institution_name, patterns in major_institutions.items():
+        for institution_name, patterns in MAJOR_INSTITUTIONS.items():
+            if not any(keyword in content_lower for keyword in INSTITUTION_KEYWORDS[institution_name]):
+                continue
+            
             for pattern in patterns:
-                matches = list(re.finditer(pattern, content_lower))
+                # Only the first occurrence is used, so stop scanning there
+                match = pattern.search(content_lower)
                 
-                if matches:
+                if match:
                     # Look around the match for numerical data
-                    match = matches[0]
                     context_start = max(0, match.start() - 800)
-                    context_end = min(len(content), match.end() + 800)
-                    context = content[context_start:context_end]
+                    context_end = min(len(content_lower), match.end() + 800)
+                    context = content_lower[context_start:context_end]
                     
                     # Extract shares (optimized pattern)
-                    shares_match = re.search(r'(\d{1,3}(?:,\d{3}){1,4})', context)
+                    # The patterns only capture digit groups, so int()/float() cannot fail on them
+                    shares_match = _RE_SHARES.search(context)
                     shares = None
                     if shares_match:
-                        try:
-                            shares = int(shares_match.group(1).replace(',', ''))
-                            # Validate reasonable share count (1K to 10B shares)
-                            if not (1000 <= shares <= 10_000_000_000):
-                                shares = None
-                        except:
+                        shares = int(shares_match.group(1).replace(b',', b''))
+                        # Validate reasonable share count (1K to 10B shares)
+                        if not (1000 <= shares <= 10_000_000_000):
                             shares = None
                     
                     # Extract percentage (optimized pattern)
-                    percent_match = re.search(r'(\d{1,2}\.?\d*)\s*%', context)
+                    percent_match = _RE_PERCENT.search(context)
                     percent = None
                     if percent_match:
-                        try:
-                            percent = float(percent_match.group(1))
-                            # Validate reasonable percentage (0.1% to 50%)
-                            if not (0.1 <= percent <= 50.0):
-                                percent = None
-                        except:
+                        percent = float(percent_match.group(1))
+                        # Validate reasonable percentage (0.1% to 50%)
+                        if not (0.1 <= percent <= 50.0):
                             percent = None
                     
                     # Only include if we found valid data
@@ -479,7 +663,7 @@ class ComprehensiveMarketScraper:
                             'holder_name': institution_name,
                             'shares': shares,
                             'percent_owned': percent,
-                            'filing_date': datetime.now().strftime('%Y-%m-%d')
+                            'filing_date': filing_date
                         }
                         holders.append(holder_record)
                         break  # Only take first valid match per institution
@@ -494,22 +678,25 @@ def main():
     print("🏛️  COMPREHENSIVE AMERICAN MARKET INSTITUTIONAL OWNERSHIP ANALYSIS")
     print("="*80)
     
-    # Run comprehensive market scraping
-    df = scraper.scrape_full_market(target_companies=500)
+    # Run comprehensive market scraping; records stream into the Parquet file as they arrive
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    parquet_filename = f"comprehensive_market_ownership_{timestamp}.parquet"
+    df = scraper.scrape_full_market(target_companies=500, output_path=parquet_filename)
     
     if not df.empty:
         # Save comprehensive results
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"comprehensive_market_ownership_{timestamp}.csv"
         df.to_csv(filename, index=False)
         
-        print(f"\n💾 COMPREHENSIVE DATA SAVED TO: {filename}")
+        print(f"\n💾 COMPREHENSIVE DATA SAVED TO: {filename} (and {parquet_filename})")
         
         # Generate comprehensive analysis
         print(f"\n🔍 COMPREHENSIVE MARKET ANALYSIS:")
         
         # Institutional dominance analysis
-        holder_presence = df['holder_name'].value_counts()
+        # Counted as plain strings: institutions never found drop out, and tied counts stay in
+        # first-seen order (on the category they would fall back to codebook order)
+        holder_presence = df['holder_name'].astype(str).value_counts()
         total_companies = df['ticker'].nunique()
         
         print(f"\n🏛️  INSTITUTIONAL MARKET DOMINANCE:")
@@ -530,7 +717,7 @@ def main():
         print(f"   Vanguard + BlackRock combined presence: {big2_companies}/{total_companies} companies ({big2_percentage:.1f}%)")
         
         # Total shares analysis
-        shares_by_holder = df.groupby('holder_name')['shares'].sum().sort_values(ascending=False)
+        shares_by_holder = df.groupby('holder_name', observed=True)['shares'].sum().sort_values(ascending=False)
         print(f"\n💰 TOTAL SHARES HELD (where data available):")
         for holder, total_shares in shares_by_holder.head(8).items():
             if pd.notna(total_shares) and total_shares > 0:
@@ -1,24 +1,34 @@
 #!/usr/bin/env python3
 import time
 import re
+import itertools
+import gzip
+import functools
 import json
+import orjson
 import pathlib
+from io import StringIO
 import random
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+import lxml.etree
+import lxml.html
 import warnings
 import sys
 import os
 
+from _sec_common import HttpCache, SecRateLimiter
+
 # Import our enhanced components
 from database import OwnershipDatabase
 from enhanced_parser import EnhancedFilingParser, OwnershipRecord
 
 # Suppress warnings
-warnings.filterwarnings("ignore", category=UserWarning, module="bs4")
 warnings.filterwarnings("ignore", category=pd.errors.ParserWarning)
 
 # ----------------------------
@@ -40,6 +50,54 @@ MAX_RETRIES = 3
 BACKOFF_FACTOR = 1.5
 TIMEOUT = 60
 
+# On-disk HTTP cache: JSON indexes are refreshed daily, while accession-numbered filing
+# documents never change once published, so they are kept indefinitely
+HTTP_CACHE_DIR = DATA_DIR / "http_cache"
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR)
+JSON_CACHE_TTL = 24 * 3600
+# Submissions payloads (often several MB each) and their indexes kept in memory; the disk
+# cache above already serves repeat reads, so this only needs to cover companies in flight
+SUBMISSIONS_MEMORY_CACHE_SIZE = 32
+
+# Primary documents in other formats (PDFs, images) are skipped without downloading them
+PARSEABLE_DOC_EXTENSIONS = (".htm", ".html", ".xml", ".txt")
+PARSEABLE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/xml", "application/xml", "text/plain")
+
+# Filing documents are streamed in chunks of this size so parsing can stop at the ownership table
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Companies processed concurrently; SEC's fair-access policy caps clients at 10 requests/second
+MAX_WORKERS = 8
+
+# Spaces requests across all threads to stay under SEC's rate limit
+_RATE_LIMITER = SecRateLimiter()
+
+def _make_session(retries: int, backoff: float) -> requests.Session:
+    """Pooled keep-alive session whose adapter retries connection errors and throttling/server
+    errors `retries` times with exponential `backoff`, honoring SEC's Retry-After header"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=retries, backoff_factor=backoff,
+                          status_forcelist=[429, 500, 502, 503, 504],
+                          respect_retry_after_header=True, raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# One session for every request made with the default retry settings
+SESSION = _make_session(MAX_RETRIES, BACKOFF_FACTOR)
+
+@functools.lru_cache(maxsize=None)
+def _session_for(retries: int, backoff: float) -> requests.Session:
+    """The shared session for a retry setting; other settings get a pooled session of their own"""
+    if (retries, backoff) == (MAX_RETRIES, BACKOFF_FACTOR):
+        return SESSION
+    return _make_session(retries, backoff)
+
 def _sleep(min_s=0.7, max_s=1.5):
     time.sleep(random.uniform(min_s, max_s))
 
@@ -51,40 +109,91 @@ def get_response(
     timeout: int = TIMEOUT,
     db: Optional[OwnershipDatabase] = None
 ) -> requests.Response:
-    headers = headers or HEADERS
+    """GET `url` over a pooled session; transient failures are retried by its adapter, up to
+    `retries` times with exponential `backoff`"""
     start_time = time.time()
+    session = _session_for(retries, backoff)
+    user_agent = (headers or session.headers).get('User-Agent')
     
-    for i in range(retries + 1):
-        try:
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            
-            # Log request for compliance monitoring
-            if db:
-                response_time = time.time() - start_time
-                db.log_request(url, response.status_code, response_time, headers.get('User-Agent'))
-            
-            return response
-        except (requests.RequestException, requests.HTTPError) as e:
-            if i < retries:
-                sleep_time = backoff * (2 ** i)
-                if DEBUG: 
-                    print(f"[retry] {url} - attempt {i+1}/{retries} in {sleep_time:.1f}s")
-                time.sleep(sleep_time)
-            else:
-                if DEBUG:
-                    print(f"[error] Failed after {retries} retries: {str(e)[:100]}")
-                # Log failed request
-                if db:
-                    response_time = time.time() - start_time
-                    db.log_request(url, 0, response_time, headers.get('User-Agent'))
-                raise
-    raise RuntimeError(f"Unexpected error with {url}")
-
-def get_json(url: str, headers: Optional[dict] = None, retries: int = 3, backoff: float = 1.0, timeout: int = 30):
-    r = get_response(url, headers, retries, backoff, timeout)
     try:
-        return r.json()
+        _RATE_LIMITER.wait()
+        response = session.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if DEBUG:
+            print(f"[error] Failed after {retries} retries: {str(e)[:100]}")
+        # Log failed request
+        if db:
+            db.log_request(url, 0, time.time() - start_time, user_agent)
+        raise
+    
+    # Log request for compliance monitoring
+    if db:
+        db.log_request(url, response.status_code, time.time() - start_time, user_agent)
+    
+    return response
+
+def get_cached(
+    url: str,
+    ttl: Optional[float] = None,
+    headers: Optional[dict] = None,
+    timeout: int = TIMEOUT,
+    retries: int = MAX_RETRIES,
+    backoff: float = BACKOFF_FACTOR,
+) -> Tuple[bytes, Optional[str]]:
+    """Return (body, encoding) for `url` from the disk cache while younger than `ttl` seconds
+    (None never expires); older entries are revalidated with a conditional GET"""
+    def fetch(validators: dict) -> requests.Response:
+        return get_response(url, {**(headers or {}), **validators} or None, retries, backoff, timeout)
+    
+    return HTTP_CACHE.get(url, fetch, ttl)
+
+def stream_ownership_table(url: str, timeout: int = TIMEOUT) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Stream a filing document through an incremental HTML parser and stop at the first
+    table that reads as a beneficial-ownership table.
+    
+    Returns (table, None) when one is found early; otherwise (None, document text) once the
+    whole document has been read, and the full body is cached like get_cached would.
+    """
+    _RATE_LIMITER.wait()
+    with SESSION.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        parser = lxml.etree.HTMLPullParser(events=("end",), tag="table")
+        chunks = []
+        # iter_content undoes the gzip transfer encoding as the chunks arrive
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            parser.feed(chunk)
+            for _, table in parser.read_events():
+                if not _RE_OWNERSHIP_TABLE.search("".join(table.itertext())):
+                    continue
+                processed = process_ownership_table(_table_to_frame(table))
+                if not processed.empty:
+                    # Closing the response drops the rest of the download
+                    return processed, None
+        
+        body = b"".join(chunks)
+    
+    HTTP_CACHE.store(url, body, response)
+    return None, body.decode(response.encoding or "utf-8", errors="replace")
+
+def get_json(
+    url: str,
+    headers: Optional[dict] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    timeout: int = 30,
+    ttl: Optional[float] = JSON_CACHE_TTL,
+):
+    body, encoding = get_cached(url, ttl, headers, timeout, retries, backoff)
+    try:
+        # orjson parses the raw bytes directly, with no str decode in between
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        pass
+    # orjson only reads UTF-8; anything else goes through a decode and the stdlib parser
+    try:
+        return json.loads(body.decode(encoding or "utf-8", errors="replace"))
     except json.JSONDecodeError:
         raise ValueError(f"Invalid JSON response from {url}")
 
@@ -96,7 +205,7 @@ def get_sp500_tickers() -> pd.DataFrame:
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
-    r = requests.get(url, headers=headers, timeout=30)
+    r = SESSION.get(url, headers=headers, timeout=30)
     r.raise_for_status()
     
     try:
@@ -112,15 +221,13 @@ def get_sp500_tickers() -> pd.DataFrame:
 # ---------------------------------------
 # 2) Map tickers -> CIK via SEC JSON
 # ---------------------------------------
-def get_ticker_cik_map() -> Dict[str, str]:
+@functools.lru_cache(maxsize=1)
+def _load_ticker_cik_map() -> Dict[str, str]:
     primary = f"{SEC_FILES_BASE}/files/company_tickers.json"
     try:
         data = get_json(primary, retries=2)
-        out = {}
-        for _, rec in data.items():
-            t = rec["ticker"].upper().strip()
-            cik10 = str(rec["cik_str"]).zfill(10)
-            out[t] = cik10
+        # cik_str is an integer here, so it is zero-padded by the format spec
+        out = {rec["ticker"].upper().strip(): f"{int(rec['cik_str']):010d}" for rec in data.values()}
         if out:
             return out
     except Exception as e:
@@ -129,82 +236,177 @@ def get_ticker_cik_map() -> Dict[str, str]:
     fallback = f"{SEC_FILES_BASE}/files/company_tickers_exchange.json"
     try:
         data = get_json(fallback, retries=2)
-        out = {}
-        for rec in data:
-            t = rec["ticker"].upper().strip()
-            cik10 = str(rec.get("cik") or rec.get("cik_str")).zfill(10)
-            out[t] = cik10
-        return out
+        out = {rec["ticker"].upper().strip(): str(rec.get("cik") or rec.get("cik_str")).zfill(10) for rec in data}
+        if out:
+            return out
     except Exception as e:
         if DEBUG: print(f"[warn] Fallback CIK map failed: {e}")
+    # Raising keeps a failed lookup out of the cache so the next call tries again
+    raise LookupError("No ticker -> CIK map available")
+
+def get_ticker_cik_map() -> Dict[str, str]:
+    """Ticker -> 10-digit CIK map, fetched once per process"""
+    try:
+        return _load_ticker_cik_map()
+    except LookupError:
         return {}
 
 # --------------------------------------------------
 # 3) SEC submissions: find latest DEF 14A per CIK
 # --------------------------------------------------
+@functools.lru_cache(maxsize=SUBMISSIONS_MEMORY_CACHE_SIZE)
 def get_company_submissions(cik10: str) -> dict:
     url = f"{SEC_API_BASE}/submissions/CIK{cik10}.json"
     return get_json(url, retries=2, backoff=1.5)
 
-def get_primary_document_from_submissions(subs: dict, accession_nodash: str) -> str:
+FilingIndexes = Tuple[Dict[str, int], Dict[str, List[Tuple[str, str, str]]]]
+
+def _build_filing_indexes(subs: dict) -> FilingIndexes:
+    accessions = subs.get("filings", {}).get("recent", {}).get("accessionNumber", [])
+    return {acc.replace("-", ""): i for i, acc in enumerate(accessions)}, index_filings(subs)
+
+@functools.lru_cache(maxsize=SUBMISSIONS_MEMORY_CACHE_SIZE)
+def get_filing_indexes(cik10: str) -> FilingIndexes:
+    """Dash-free accession -> array position, and index_filings(), for one company.
+    Built once per CIK and cached here rather than stored on the payload that
+    get_company_submissions shares between threads, so later lookups of any form are O(1)."""
+    return _build_filing_indexes(get_company_submissions(cik10))
+
+def _submissions_and_indexes(subs: Union[dict, str]) -> Tuple[dict, FilingIndexes]:
+    """Accept either a submissions payload, indexed on the spot, or a CIK, whose payload and
+    indexes come from the caches"""
+    if isinstance(subs, str):
+        return get_company_submissions(subs), get_filing_indexes(subs)
+    return subs, _build_filing_indexes(subs)
+
+def get_primary_document_from_submissions(subs: Union[dict, str], accession_nodash: str) -> str:
+    """Primary document of a filing; `subs` is the submissions payload or the company's CIK"""
+    subs, (accession_index, _) = _submissions_and_indexes(subs)
     filings = subs.get("filings", {}).get("recent", {})
-    accessions = filings.get("accessionNumber", [])
     primary_docs = filings.get("primaryDocument", [])
     
-    for i, acc in enumerate(accessions):
-        if acc.replace("-", "") == accession_nodash:
-            return primary_docs[i] if i < len(primary_docs) else ""
-    return ""
-
-def find_latest_def14a(subs: dict) -> Optional[Tuple[str, str, str]]:
+    i = accession_index.get(accession_nodash)
+    if i is None:
+        return ""
+    return primary_docs[i] if i < len(primary_docs) else ""
+
+def is_parseable_document(url: str, primary_doc: str) -> bool:
+    """Whether a filing document looks like something parse_proxy_content can read, judged
+    by its extension; only extension-less names cost a HEAD request"""
+    ext = os.path.splitext(primary_doc)[1].lower()
+    if ext:
+        return ext in PARSEABLE_DOC_EXTENSIONS
+    try:
+        _RATE_LIMITER.wait()
+        response = SESSION.head(url, timeout=TIMEOUT, allow_redirects=True)
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    except requests.RequestException:
+        return True  # Let the real download report the problem
+    return not content_type or content_type in PARSEABLE_CONTENT_TYPES
+
+def index_filings(subs: dict) -> Dict[str, List[Tuple[str, str, str]]]:
+    """Group recent filings by form type in one pass over the submission arrays:
+    form -> [(filing_date, accession_nodash, primary_doc), ...] in payload order."""
     filings = subs.get("filings", {}).get("recent", {})
-    forms = filings.get("form", [])
-    filing_dates = filings.get("filingDate", [])
-    accessions = filings.get("accessionNumber", [])
-    primary_docs = filings.get("primaryDocument", [])
-
-    latest_idx = None
-    latest_date = None
-    for i, form in enumerate(forms):
-        if str(form).strip().upper() in ["DEF 14A", "DEF 14"]:
-            d = filing_dates[i]
-            if (latest_date is None) or (d > latest_date):
-                latest_date = d
-                latest_idx = i
-
-    if latest_idx is None:
+    index = {}
+    # A short primaryDocument array leaves the remaining filings without a document
+    primary_docs = itertools.chain(filings.get("primaryDocument", []), itertools.repeat(""))
+    for form, filing_date, accession, primary_doc in zip(
+        filings.get("form", []), filings.get("filingDate", []), filings.get("accessionNumber", []), primary_docs
+    ):
+        index.setdefault(str(form).strip().upper(), []).append(
+            (filing_date, accession.replace("-", ""), primary_doc)
+        )
+    return index
+
+def find_latest_def14a(subs: Union[dict, str]) -> Optional[Tuple[str, str, str]]:
+    """Latest DEF 14A as (filing_date, accession_nodash, primary_doc); `subs` is the
+    submissions payload or the company's CIK"""
+    _, (_, index) = _submissions_and_indexes(subs)
+    proxies = index.get("DEF 14A", []) + index.get("DEF 14", [])
+    if not proxies:
         return None
-
-    acc_no_dash = accessions[latest_idx].replace("-", "")
-    primary_doc = primary_docs[latest_idx] if latest_idx < len(primary_docs) else ""
-    return filing_dates[latest_idx], acc_no_dash, primary_doc
+    # max keeps the first of equally dated filings
+    return max(proxies, key=lambda filing: filing[0])
 
 # -----------------------------------------------------
 # 4) Enhanced Proxy Parsing
 # -----------------------------------------------------
+# Patterns are compiled once here rather than looked up in re's cache on every row
+_RE_WS = re.compile(r"\s+")
+_RE_PERCENT = re.compile(r"([0-9]+(?:\.[0-9]+)?)\s*%")
+_RE_NONDIGIT = re.compile(r"[^\d]")
+_RE_HTML = re.compile(r"<!DOCTYPE html|</html>", re.I)
+_RE_XML = re.compile(r"<\?xml|</[a-zA-Z]+>")
+_RE_OWNERSHIP_HEADER = re.compile(r"security own|beneficial own|stock own|ownership|shareholdings", re.I)
+# [^\n]* rather than a lazy .*? for the heading line: when no blank line follows, the lazy form
+# retries from every later newline, which is quadratic on long text-only filings
+_RE_SECTION = re.compile(r"(Security Ownership|Beneficial Ownership)[^\n]*\n(.*?)\n\n", re.DOTALL | re.IGNORECASE)
+_RE_OWNERSHIP_TABLE = re.compile(r"beneficial(?:ly)?\s+own|security\s+own|percent\s+of\s+class", re.I)
+# Cheap document-level prefilter: proxies without any of these never hold an ownership table.
+# It runs on the raw markup, so words may also be split by a line break or a no-break space
+# entity ("Beneficial&#160;Ownership"). The flag is inline because read_html's lxml flavor
+# only forwards the pattern string.
+_OWNERSHIP_SEP = r"(?:\s|&#160;|&#xa0;|&nbsp;)+"
+_RE_OWNERSHIP_KEYWORDS = re.compile(
+    r"(?i)beneficial(?:ly)?{0}own|security{0}own|stock{0}own|percent{0}of{0}class".format(_OWNERSHIP_SEP)
+)
+_RE_ROW = re.compile(r"(\w[\w\s,.]+?)\s+(\d{1,3}(?:,\d{3})*\s+)?(\d+(?:\.\d+)?%)")
+
+# Canonical names for the large institutions, matched against the lowercased holder name
+_HOLDER_ALIASES = [
+    (re.compile(r"\bthe vanguard group.*"), "Vanguard Group"),
+    (re.compile(r"\bblackrock,? inc\.?"), "BlackRock"),
+    (re.compile(r"\bstate street.*"), "State Street"),
+    (re.compile(r"\bfidelity(?: management .*?)?"), "Fidelity"),
+    (re.compile(r"\bt\.? rowe price.*"), "T. Rowe Price"),
+    (re.compile(r"\bberkshire hathaway.*"), "Berkshire Hathaway"),
+]
+# All aliases as one alternation, one capturing group each, so most names take a single scan
+_RE_ALIAS_UNION = re.compile("|".join(f"({pat.pattern})" for pat, _ in _HOLDER_ALIASES))
+
 def clean_holder_name(name: str) -> str:
     if not isinstance(name, str):
         return name
-    n = re.sub(r"\s+", " ", name).strip()
-    aliases = {
-        r"\bthe vanguard group.*": "Vanguard Group",
-        r"\bblackrock,? inc\.?": "BlackRock",
-        r"\bstate street.*": "State Street",
-        r"\bfidelity(?: management .*?)?": "Fidelity",
-        r"\bt\.? rowe price.*": "T. Rowe Price",
-        r"\bberkshire hathaway.*": "Berkshire Hathaway",
-    }
+    n = _RE_WS.sub(" ", name).strip()
     lower = n.lower()
-    for pat, repl in aliases.items():
-        if re.search(pat, lower):
+    m = _RE_ALIAS_UNION.search(lower)
+    if m is None:
+        return n
+    
+    # The union finds the leftmost alias; an earlier alias in the list may still match further
+    # along the name and takes priority, so only those few are rechecked
+    hit = m.lastindex - 1
+    for pat, repl in _HOLDER_ALIASES[:hit]:
+        if pat.search(lower):
             return repl
-    return n
+    return _HOLDER_ALIASES[hit][1]
+
+def clean_holder_names(names: pd.Series) -> pd.Series:
+    """Vectorized clean_holder_name over a Series of strings"""
+    cleaned = names.str.replace(_RE_WS, " ", regex=True).str.strip()
+    lower = cleaned.str.lower()
+    # Apply aliases last-to-first so the earliest matching alias wins, as in clean_holder_name
+    for pat, repl in reversed(_HOLDER_ALIASES):
+        cleaned = cleaned.mask(lower.str.contains(pat, na=False), repl)
+    return cleaned
+
+def extract_percents(values: pd.Series) -> pd.Series:
+    """Vectorized extract_percent: the number before a '%', else the cell as a plain number"""
+    text = values.astype(str)
+    percent = pd.to_numeric(text.str.extract(_RE_PERCENT, expand=False), errors="coerce")
+    return percent.fillna(pd.to_numeric(text, errors="coerce"))
+
+def extract_share_counts(values: pd.Series) -> pd.Series:
+    """Digits of each cell as a number, NaN where a cell has none"""
+    digits = values.astype(str).str.replace(_RE_NONDIGIT, "", regex=True)
+    return pd.to_numeric(digits.mask(digits == ""), errors="coerce")
 
 def extract_percent(value):
     if pd.isna(value):
         return None
     s = str(value)
-    m = re.search(r"([0-9]+(?:\.[0-9]+)?)\s*%", s)
+    m = _RE_PERCENT.search(s)
     if m:
         return float(m.group(1))
     try:
@@ -214,9 +416,9 @@ def extract_percent(value):
 
 def detect_content_type(content: str) -> str:
     """Detect actual content format regardless of headers"""
-    if re.search(r"<!DOCTYPE html|</html>", content, re.I):
+    if _RE_HTML.search(content):
         return "html"
-    elif re.search(r"<\?xml|</[a-zA-Z]+>", content):
+    elif _RE_XML.search(content):
         return "xml"
     return "text"
 
@@ -243,28 +445,24 @@ def detect_ownership_columns(df: pd.DataFrame) -> dict:
 def process_ownership_table(df: pd.DataFrame) -> pd.DataFrame:
     """Process detected ownership table"""
     # Normalize columns
-    df.columns = [re.sub(r"\s+", " ", str(c)).strip() for c in df.columns]
+    df.columns = [_RE_WS.sub(" ", str(c)).strip() for c in df.columns]
     
     # Detect columns
     col_map = detect_ownership_columns(df)
     
     out = pd.DataFrame()
     out["holder_raw"] = df.iloc[:, col_map['name']].astype(str) if 'name' in col_map else df.iloc[:, 0].astype(str)
-    out["holder"] = out["holder_raw"].map(clean_holder_name)
+    out["holder"] = clean_holder_names(out["holder_raw"])
 
     # Process percentage column
     if 'percent' in col_map:
-        out["percent_class"] = df.iloc[:, col_map['percent']].map(extract_percent)
+        out["percent_class"] = extract_percents(df.iloc[:, col_map['percent']])
     else:
         out["percent_class"] = None
 
     # Process shares column
     if 'shares' in col_map:
-        def to_int(x):
-            if pd.isna(x): return None
-            s = re.sub(r"[^\d]", "", str(x))
-            return int(s) if s.isdigit() else None
-        out["shares"] = df.iloc[:, col_map['shares']].map(to_int)
+        out["shares"] = extract_share_counts(df.iloc[:, col_map['shares']])
     else:
         out["shares"] = None
 
@@ -273,34 +471,98 @@ def process_ownership_table(df: pd.DataFrame) -> pd.DataFrame:
     out = out[out["holder"].str.len() > 1].reset_index(drop=True)
     return out
 
+def _single_string(element) -> Optional[str]:
+    """The element's text when it is a lone string, possibly inside a chain of only-children
+    (what BeautifulSoup exposes as `.string`); None for mixed content"""
+    while len(element) == 1 and not element.text and not element[0].tail:
+        element = element[0]
+    if len(element) or not isinstance(element.tag, str):
+        return None
+    return element.text
+
+def _cell_span(cell, attr: str) -> int:
+    try:
+        return max(1, min(int(cell.get(attr, 1)), 100))
+    except ValueError:
+        return 1
+
+def _table_to_frame(table) -> pd.DataFrame:
+    """Build a DataFrame straight from a table element's rows, without re-serializing it
+    for pd.read_html. Leading all-<th> (or <thead>) rows become the column labels, and
+    colspans and rowspans repeat the cell text across and down, as read_html does."""
+    header, body = [], []
+    # Text that a rowspan carries into later rows: column -> [text, rows still to fill]
+    spanned = {}
+    
+    def take_spanned(cells):
+        text_left = spanned[len(cells)]
+        cells.append(text_left[0])
+        text_left[1] -= 1
+        if not text_left[1]:
+            del spanned[len(cells) - 1]
+    
+    for tr in table.xpath("./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr"):
+        own_cells = [cell for cell in tr if cell.tag in ("td", "th")]
+        if not own_cells:
+            continue
+        cells = []
+        for cell in own_cells:
+            while len(cells) in spanned:
+                take_spanned(cells)
+            text = _RE_WS.sub(" ", "".join(cell.itertext())).strip()
+            rowspan = _cell_span(cell, "rowspan")
+            for _ in range(_cell_span(cell, "colspan")):
+                if rowspan > 1:
+                    spanned[len(cells)] = [text, rowspan - 1]
+                cells.append(text)
+        # Spans reaching past this row's own cells
+        for col in sorted(c for c in spanned if c >= len(cells)):
+            cells.extend([None] * (col - len(cells)))
+            take_spanned(cells)
+        
+        if not body and (all(cell.tag == "th" for cell in own_cells) or tr.getparent().tag == "thead"):
+            header.append(cells)
+        else:
+            body.append(cells)
+    
+    width = max((len(r) for r in header + body), default=0)
+    body = [r + [None] * (width - len(r)) for r in body]
+    if not header:
+        return pd.DataFrame(body)
+    # Several header rows are joined per column so their words all reach column detection;
+    # a label repeated down by a rowspan is only kept once
+    padded = [h + [""] * (width - len(h)) for h in header]
+    columns = [" ".join(dict.fromkeys(part for part in parts if part)) for parts in zip(*padded)]
+    return pd.DataFrame(body, columns=columns)
+
 def find_ownership_table_in_html(html: str) -> Optional[pd.DataFrame]:
     """Find ownership table by section headers in HTML"""
-    soup = BeautifulSoup(html, "lxml")
+    tree = lxml.html.document_fromstring(html)
     
     # Find ownership sections by header text
-    ownership_headers = soup.find_all(['h1', 'h2', 'h3', 'h4', 'div', 'span'], 
-        string=re.compile(r'security own|beneficial own|stock own|ownership|shareholdings', re.I))
+    ownership_headers = [
+        el for el in tree.iter('h1', 'h2', 'h3', 'h4', 'div', 'span')
+        if _RE_OWNERSHIP_HEADER.search(_single_string(el) or "")
+    ]
     
     # Also look for specific section IDs
     section_ids = ["securityOwnership", "beneficialOwnership", "stockOwnership"]
     for section_id in section_ids:
-        section = soup.find(id=section_id)
+        section = tree.xpath("//*[@id=$id]", id=section_id)
         if section:
-            ownership_headers.append(section)
+            ownership_headers.append(section[0])
     
     for header in ownership_headers:
         # Expand search area
         section = header
         for _ in range(3):  # Look through parent elements
-            section = section.parent if section else None
-            if not section:
+            section = section.getparent() if section is not None else None
+            if section is None:
                 break
             
-            tables = section.find_all('table')
-            for table in tables:
+            for table in section.iterdescendants('table'):
                 try:
-                    df = pd.read_html(str(table))[0]
-                    processed = process_ownership_table(df)
+                    processed = process_ownership_table(_table_to_frame(table))
                     if not processed.empty:
                         return processed
                 except Exception as e:
@@ -308,38 +570,53 @@ def find_ownership_table_in_html(html: str) -> Optional[pd.DataFrame]:
                     continue
     return None
 
+# Compiled once; local-name() keeps the lookups working in namespaced filings
+_XP_XML_SECTION = lxml.etree.XPath("(//*[local-name()=$tag])[1]")
+_XP_XML_SECTION_TABLES = lxml.etree.XPath(".//*[local-name()='table']")
+_XML_TABLE_KEYWORDS = ["security own", "beneficial own", "stock own", "ownership"]
+_XP_XML_KEYWORD_TABLES = lxml.etree.XPath(
+    "//*[local-name()='table'][{}]".format(" or ".join(
+        f"contains(translate(string(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{k}')"
+        for k in _XML_TABLE_KEYWORDS
+    ))
+)
+_XML_SECTION_TAGS = ["ownship", "securityOwnership", "beneficialOwnership"]
+
+def _strip_namespaces(table):
+    """Drop namespace prefixes from a table's tags so _table_to_frame sees plain tr/td names"""
+    for el in table.iter():
+        if isinstance(el.tag, str) and el.tag[0] == "{":
+            el.tag = lxml.etree.QName(el).localname
+    return table
+
 def find_ownership_table_in_xml(xml: str) -> Optional[pd.DataFrame]:
     """Find ownership table in XML filings"""
     try:
-        soup = BeautifulSoup(xml, "lxml-xml")
+        parser = lxml.etree.XMLParser(recover=True, huge_tree=True)
+        tree = lxml.etree.fromstring(xml.encode(), parser)
+        if tree is None:
+            return None
         
         # Look for specific XML sections
-        section_tags = ["ownship", "securityOwnership", "beneficialOwnership"]
-        for tag in section_tags:
-            section = soup.find(tag)
+        for tag in _XML_SECTION_TAGS:
+            section = _XP_XML_SECTION(tree, tag=tag)
             if section:
-                tables = section.find_all('table')
-                for table in tables:
+                for table in _XP_XML_SECTION_TABLES(section[0]):
                     try:
-                        df = pd.read_html(str(table))[0]
-                        processed = process_ownership_table(df)
+                        processed = process_ownership_table(_table_to_frame(_strip_namespaces(table)))
                         if not processed.empty:
                             return processed
                     except Exception:
                         pass
         
-        # Look for table with ownership keywords
-        tables = soup.find_all('table')
-        for table in tables:
-            table_text = table.get_text().lower()
-            if any(k in table_text for k in ["security own", "beneficial own", "stock own", "ownership"]):
-                try:
-                    df = pd.read_html(str(table))[0]
-                    processed = process_ownership_table(df)
-                    if not processed.empty:
-                        return processed
-                except Exception:
-                    pass
+        # Look for table with ownership keywords (the XPath itself does the keyword match)
+        for table in _XP_XML_KEYWORD_TABLES(tree):
+            try:
+                processed = process_ownership_table(_table_to_frame(_strip_namespaces(table)))
+                if not processed.empty:
+                    return processed
+            except Exception:
+                pass
                     
         return None
     except Exception as e:
@@ -349,8 +626,7 @@ def find_ownership_table_in_xml(xml: str) -> Optional[pd.DataFrame]:
 def extract_from_text(content: str) -> Optional[pd.DataFrame]:
     """Manual extraction for text-based ownership sections"""
     # Look for ownership section
-    section_pattern = r"(Security Ownership|Beneficial Ownership).*?\n(.*?)\n\n"
-    match = re.search(section_pattern, content, re.DOTALL | re.IGNORECASE)
+    match = _RE_SECTION.search(content)
     if not match:
         return None
         
@@ -358,8 +634,8 @@ def extract_from_text(content: str) -> Optional[pd.DataFrame]:
     
     # Find table-like data
     rows = []
-    row_pattern = r"(\w[\w\s,.]+?)\s+(\d{1,3}(?:,\d{3})*\s+)?(\d+\.\d+%|\d+%)"
-    matches = re.findall(row_pattern, section_text)
+    # Every row ends in a percentage; without one the row pattern can only backtrack
+    matches = _RE_ROW.findall(section_text) if "%" in section_text else []
     
     for match in matches:
         holder = match[0].strip()
@@ -383,9 +659,14 @@ def extract_from_text(content: str) -> Optional[pd.DataFrame]:
 
 def parse_proxy_content(content: str) -> Optional[pd.DataFrame]:
     """Master parser that tries multiple strategies"""
-    # Strategy 1: Try direct table parsing
+    # Skip every strategy for documents that never mention beneficial/stock ownership
+    if not _RE_OWNERSHIP_KEYWORDS.search(content):
+        if DEBUG: print("[parse] No ownership keywords in document")
+        return None
+    
+    # Strategy 1: Try direct table parsing, letting read_html keep only keyword tables
     try:
-        tables = pd.read_html(content)
+        tables = pd.read_html(StringIO(content), match=_RE_OWNERSHIP_KEYWORDS)
         for table in tables:
             processed = process_ownership_table(table)
             if not processed.empty:
@@ -412,110 +693,173 @@ def parse_proxy_content(content: str) -> Optional[pd.DataFrame]:
 # ------------------------------------------------------------
 # 5) Driver: loop S&P 500, pull DEF 14A, parse ownership
 # ------------------------------------------------------------
-def fetch_ownership_for_sp500(limit: Optional[int] = 5) -> pd.DataFrame:
+def _process_ticker(ticker: str, security: str, sector: str, cik: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """Fetch and parse the latest DEF 14A ownership table for one company.
+    Returns the holder rows and the filing's per-company fields, which are kept out of the
+    rows so they are stored once per ticker rather than once per holder."""
+    try:
+        _sleep()
+        if DEBUG: print(f"\n[info] Processing {ticker} (CIK: {cik})")
+        
+        # Latest proxy from the company's submissions
+        found = find_latest_def14a(cik)
+        if not found:
+            if DEBUG: print(f"[skip] No DEF 14A for {ticker}")
+            return None
+
+        filing_date, acc_nodash, primary_doc = found
+        if not primary_doc:
+            if DEBUG: print(f"[skip] No primary doc for {ticker}")
+            return None
+            
+        url = f"{SEC_FILES_BASE}/Archives/edgar/data/{int(cik)}/{acc_nodash}/{primary_doc}"
+        if DEBUG: print(f"[doc] Filing URL: {url}")
+        if not is_parseable_document(url, primary_doc):
+            if DEBUG: print(f"[skip] Primary doc for {ticker} is not HTML/XML/text: {primary_doc}")
+            return None
+
+        # Fetch document: a cached copy is parsed whole, otherwise the download is streamed
+        # and stops as soon as the ownership table has gone by
+        df = None
+        try:
+            if HTTP_CACHE.read_meta(url) is not None:
+                body, encoding = get_cached(url)
+                content = body.decode(encoding or "utf-8", errors="replace")
+            else:
+                df, content = stream_ownership_table(url)
+            if DEBUG: 
+                print(f"[downloaded] {'ownership table found early' if df is not None else f'{len(content)} bytes'}")
+        except Exception as e:
+            if DEBUG: print(f"[error] Download failed: {e}")
+            return None
+
+        # Parse ownership table
+        if df is None:
+            df = parse_proxy_content(content)
+        if df is None or df.empty:
+            if DEBUG: print(f"[skip] No ownership table parsed for {ticker}")
+            # Save for debugging, gzipped: proxies run to tens of MB and compress about 10x
+            debug_path = DATA_DIR / f"{ticker}_proxy.html.gz"
+            with gzip.open(debug_path, "wt", encoding="utf-8", compresslevel=3) as f:
+                f.write(content)
+            if DEBUG: print(f"[debug] Saved HTML to {debug_path}")
+            return None
+
+        if DEBUG: print(f"[success] Parsed {len(df)} holders for {ticker}")
+        return df, {"company": security, "sector": sector, "filing_date": filing_date, "filing_url": url}
+        
+    except Exception as e:
+        print(f"[error] {ticker}: {str(e)[:100]}")
+        return None
+
+# Column order of the saved ownership CSV: holder fields, then the company fields
+OUTPUT_COLUMNS = ["holder_raw", "holder", "percent_class", "shares", "ticker", "company", "sector", "filing_date", "filing_url"]
+
+def _valid_percents(series: pd.Series) -> pd.Series:
+    """Blank out percent-of-class values outside 0-100, which are parse errors"""
+    values = pd.to_numeric(series, errors="coerce")
+    return values.where(values.between(0, 100))
+
+def iter_ownership_for_sp500(limit: Optional[int] = 5, max_workers: int = MAX_WORKERS) -> Iterator[Tuple[str, pd.DataFrame, dict]]:
+    """Yield (ticker, holder rows, filing fields) for each S&P 500 company whose proxy parses,
+    in S&P 500 order, stopping after `limit` companies (None for all)"""
     spx = get_sp500_tickers()
     tick2cik = get_ticker_cik_map()
 
-    rows = []
-    processed = 0
-    for _, row in spx.iterrows():
-        if processed >= limit:
-            break
-            
-        ticker = row["ticker"].upper()
-        security = row["Security"]
-        sector = row["GICS Sector"]
-
+    candidates = []
+    for ticker, security, sector in zip(spx["ticker"], spx["Security"], spx["GICS Sector"]):
+        ticker = ticker.upper()
         cik = tick2cik.get(ticker)
         if not cik:
             if DEBUG: print(f"[skip] No CIK for {ticker}")
             continue
-
-        try:
-            _sleep()
-            if DEBUG: print(f"\n[info] Processing {ticker} (CIK: {cik})")
-            
-            # Get company submissions
-            subs = get_company_submissions(cik)
-            found = find_latest_def14a(subs)
-            if not found:
-                if DEBUG: print(f"[skip] No DEF 14A for {ticker}")
-                continue
-
-            filing_date, acc_nodash, primary_doc = found
-            if not primary_doc:
-                if DEBUG: print(f"[skip] No primary doc for {ticker}")
-                continue
-                
-            url = f"{SEC_FILES_BASE}/Archives/edgar/data/{int(cik)}/{acc_nodash}/{primary_doc}"
-            if DEBUG: print(f"[doc] Filing URL: {url}")
-
-            # Fetch document
-            try:
-                response = get_response(url)
-                content = response.text
-                if DEBUG: 
-                    print(f"[downloaded] {len(content)} bytes")
-            except Exception as e:
-                if DEBUG: print(f"[error] Download failed: {e}")
-                continue
-
-            # Parse ownership table
-            df = parse_proxy_content(content)
-            if df is None or df.empty:
-                if DEBUG: print(f"[skip] No ownership table parsed for {ticker}")
-                # Save for debugging
-                debug_path = DATA_DIR / f"{ticker}_proxy.html"
-                with open(debug_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                if DEBUG: print(f"[debug] Saved HTML to {debug_path}")
-                continue
-
-            df["ticker"] = ticker
-            df["company"] = security
-            df["sector"] = sector
-            df["filing_date"] = filing_date
-            df["filing_url"] = url
-            rows.append(df)
-            if DEBUG: print(f"[success] Parsed {len(df)} holders for {ticker}")
-            processed += 1
-            
-        except Exception as e:
-            print(f"[error] {ticker}: {str(e)[:100]}")
-            continue
-
-    if not rows:
+        candidates.append((ticker, security, sector, cik))
+
+    # Companies are fetched in parallel one batch of `max_workers` at a time, so no more than a
+    # batch is fetched past `limit`; map keeps results in S&P 500 order. get_response paces
+    # the SEC requests across all workers.
+    found = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for start in range(0, len(candidates), max_workers):
+            if limit is not None and found >= limit:
+                break
+            batch = candidates[start:start + max_workers]
+            for (ticker, *_), result in zip(batch, pool.map(lambda args: _process_ticker(*args), batch)):
+                if result is not None and (limit is None or found < limit):
+                    found += 1
+                    yield (ticker, *result)
+
+def fetch_ownership_for_sp500(limit: Optional[int] = 5, max_workers: int = MAX_WORKERS) -> pd.DataFrame:
+    holders_per_ticker: Dict[str, pd.DataFrame] = {}
+    filings: Dict[str, dict] = {}
+    for ticker, df, filing in iter_ownership_for_sp500(limit, max_workers):
+        holders_per_ticker[ticker] = df
+        filings[ticker] = filing
+
+    if not holders_per_ticker:
         print("[info] No rows parsed; nothing to save.")
         return pd.DataFrame(columns=["ticker","company","holder","percent_class","shares","filing_date","filing_url","sector"])
 
-    combined = pd.concat(rows, ignore_index=True)
+    # The dict keys become the ticker level, and the per-company fields are joined on once at
+    # the end; ticker/company/sector repeat on every holder row, so they are stored as categories
+    combined = (
+        pd.concat(holders_per_ticker, names=["ticker", None])
+        .reset_index(level="ticker")
+        .reset_index(drop=True)
+    )
+    # Holder fields first, then the company fields, as when they were attached per ticker
+    combined = combined[[*combined.columns[1:], "ticker"]].join(
+        pd.DataFrame.from_dict(filings, orient="index"), on="ticker"
+    )
+    combined = combined.astype({"ticker": "category", "company": "category", "sector": "category"})
     if "percent_class" in combined.columns:
-        combined["percent_class"] = combined["percent_class"].apply(
-            lambda x: x if (pd.notna(x) and 0 <= x <= 100) else None
-        )
+        combined["percent_class"] = _valid_percents(combined["percent_class"])
 
     return combined
 
+def write_ownership_for_sp500(
+    out_path,
+    limit: Optional[int] = 5,
+    max_workers: int = MAX_WORKERS,
+    track_holders: List[str] = (),
+) -> Tuple[int, pd.DataFrame]:
+    """Append each company's rows to the CSV at `out_path` as soon as they are parsed, so only
+    one company's table is held in memory. Returns the number of rows written and the rows
+    of `track_holders`, kept aside for summaries."""
+    total = 0
+    tracked = []
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        for ticker, df, filing in iter_ownership_for_sp500(limit, max_workers):
+            df = df.assign(ticker=ticker, **filing).reindex(columns=OUTPUT_COLUMNS)
+            df["percent_class"] = _valid_percents(df["percent_class"])
+            df.to_csv(f, header=total == 0, index=False)
+            total += len(df)
+            if track_holders:
+                tracked.append(df[df["holder"].isin(track_holders)])
+
+    if not total:
+        print("[info] No rows parsed; nothing to save.")
+    tracked_df = pd.concat(tracked, ignore_index=True) if tracked else pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return total, tracked_df
+
 if __name__ == "__main__":
     print("Starting ownership data collection...")
     try:
-        df = fetch_ownership_for_sp500(limit=5)
-        if df.empty:
+        # Rows go to disk company by company; only the Big 4 rows are kept for the summary
+        out_path = (DATA_DIR / "ownership_sp500.csv").resolve()
+        big4 = ["Vanguard Group", "BlackRock", "State Street", "Fidelity"]
+        total, big4_df = write_ownership_for_sp500(out_path, limit=5, track_holders=big4)
+        if not total:
+            out_path.unlink(missing_ok=True)
             print("\nNo data collected. Check debug output for issues.")
         else:
             print("\nPreview of collected data:")
             with pd.option_context('display.max_columns', None, 'display.width', 160):
-                print(df.head(20))
-            print(f"\nTotal rows collected: {len(df)}")
-            
-            out_path = (DATA_DIR / "ownership_sp500.csv").resolve()
-            df.to_csv(out_path, index=False)
+                print(pd.read_csv(out_path, nrows=20))
+            print(f"\nTotal rows collected: {total}")
             print(f"Saved: {out_path}")
             
             # Big 4 analysis
-            big4 = ["Vanguard Group", "BlackRock", "State Street", "Fidelity"]
-            big4_df = df[df["holder"].isin(big4)]
-            
             if not big4_df.empty:
                 print("\nBig 4 Ownership Summary:")
                 summary = big4_df.groupby(["ticker", "company", "holder"])["percent_class"].sum().unstack()
@@ -4,284 +4,403 @@ Simple, fast SEC ownership scraper - gets the job done in minutes, not hours.
 Focus: Extract top institutional holders quickly with minimal complexity.
 """
 
+import codecs
+import json
+import os
+import pathlib
 import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
+from _sec_common import INSTITUTION_KEYWORDS, HttpCache, SecRateLimiter, company_pool, load_cik_map
+
+# Companies fetched at once; requests from all of them share the SEC rate limit
+MAX_WORKERS = 8
+
+# Columns of the collected records; converted to Arrow in one pass rather than row by row
+OWNERSHIP_SCHEMA = pa.schema([
+    ('ticker', pa.string()),
+    ('company_name', pa.string()),
+    ('holder_name', pa.string()),
+    ('shares', pa.int64()),
+    ('percent_owned', pa.float64()),
+    ('filing_date', pa.string()),
+])
+
+# Known institutional investors with their patterns, compiled once. Each pattern is searched for
+# on its own: they all start with a literal, which re scans for far faster than it can walk one
+# combined alternation.
+MAJOR_INSTITUTIONS = {
+    institution: [re.compile(pattern) for pattern in patterns]
+    for institution, patterns in {
+        'Vanguard Group': [
+            r'vanguard\s+group',
+            r'the\s+vanguard\s+group',
+            r'vanguard\s+fiduciary'
+        ],
+        'BlackRock': [
+            r'blackrock,?\s+inc',
+            r'blackrock\s+fund',
+            r'blackrock\s+institutional'
+        ],
+        'State Street': [
+            r'state\s+street\s+corp',
+            r'state\s+street\s+corporation',
+            r'state\s+street\s+global'
+        ],
+        'Fidelity': [
+            r'fidelity\s+management',
+            r'fmr\s+llc',
+            r'fidelity\s+investments'
+        ],
+        'T. Rowe Price': [
+            r't\.?\s*rowe\s+price',
+            r't\.\s*rowe\s+price\s+associates'
+        ],
+        'Berkshire Hathaway': [
+            r'berkshire\s+hathaway'
+        ],
+        'JPMorgan': [
+            r'jpmorgan\s+chase',
+            r'jp\s+morgan'
+        ],
+        'Capital Group': [
+            r'capital\s+group',
+            r'capital\s+research'
+        ]
+    }.items()
+}
+_RE_SHARES = re.compile(r'(\d{1,3}(?:,\d{3}){1,3})')
+_RE_PERCENT = re.compile(r'(\d+\.?\d*)\s*%')
+
+# Top 60 S&P 500 companies by market cap, built once at import (hardcoded for speed)
+TOP_COMPANIES = (
+    ('AAPL', 'Apple Inc.'),
+    ('MSFT', 'Microsoft Corporation'),
+    ('GOOGL', 'Alphabet Inc.'),
+    ('AMZN', 'Amazon.com Inc.'),
+    ('NVDA', 'NVIDIA Corporation'),
+    ('TSLA', 'Tesla Inc.'),
+    ('META', 'Meta Platforms Inc.'),
+    ('BRK-B', 'Berkshire Hathaway Inc.'),
+    ('UNH', 'UnitedHealth Group Inc.'),
+    ('JNJ', 'Johnson & Johnson'),
+    ('XOM', 'Exxon Mobil Corporation'),
+    ('JPM', 'JPMorgan Chase & Co.'),
+    ('V', 'Visa Inc.'),
+    ('PG', 'Procter & Gamble Company'),
+    ('MA', 'Mastercard Incorporated'),
+    ('HD', 'Home Depot Inc.'),
+    ('CVX', 'Chevron Corporation'),
+    ('ABBV', 'AbbVie Inc.'),
+    ('PFE', 'Pfizer Inc.'),
+    ('KO', 'Coca-Cola Company'),
+    ('LLY', 'Eli Lilly and Company'),
+    ('AVGO', 'Broadcom Inc.'),
+    ('WMT', 'Walmart Inc.'),
+    ('BAC', 'Bank of America Corporation'),
+    ('ORCL', 'Oracle Corporation'),
+    ('CRM', 'Salesforce Inc.'),
+    ('COST', 'Costco Wholesale Corporation'),
+    ('NFLX', 'Netflix Inc.'),
+    ('AMD', 'Advanced Micro Devices Inc.'),
+    ('ADBE', 'Adobe Inc.'),
+    ('TMO', 'Thermo Fisher Scientific Inc.'),
+    ('ACN', 'Accenture plc'),
+    ('MRK', 'Merck & Co. Inc.'),
+    ('TXN', 'Texas Instruments Incorporated'),
+    ('LIN', 'Linde plc'),
+    ('CSCO', 'Cisco Systems Inc.'),
+    ('ABT', 'Abbott Laboratories'),
+    ('WFC', 'Wells Fargo & Company'),
+    ('DHR', 'Danaher Corporation'),
+    ('VZ', 'Verizon Communications Inc.'),
+    ('QCOM', 'QUALCOMM Incorporated'),
+    ('INTC', 'Intel Corporation'),
+    ('CMCSA', 'Comcast Corporation'),
+    ('IBM', 'International Business Machines Corporation'),
+    ('T', 'AT&T Inc.'),
+    ('CAT', 'Caterpillar Inc.'),
+    ('GE', 'General Electric Company'),
+    ('NEE', 'NextEra Energy Inc.'),
+    ('RTX', 'Raytheon Technologies Corporation'),
+    ('HON', 'Honeywell International Inc.'),
+    ('SPGI', 'S&P Global Inc.'),
+    ('LOW', 'Lowe\'s Companies Inc.'),
+    ('INTU', 'Intuit Inc.'),
+    ('UPS', 'United Parcel Service Inc.'),
+    ('MS', 'Morgan Stanley'),
+    ('GS', 'Goldman Sachs Group Inc.'),
+    ('AMGN', 'Amgen Inc.'),
+    ('DE', 'Deere & Company'),
+    ('BKNG', 'Booking Holdings Inc.'),
+    ('BLK', 'BlackRock Inc.'),
+)
+
+# SEC endpoints: a company's filing index, and a filing document inside its accession folder
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
+ARCHIVE_URL = "https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{document}"
+
+# Other SEC responses are cached on disk by URL. Entries older than a day, submissions lists
+# and filing documents alike, are revalidated with a conditional GET and only downloaded again
+# when SEC reports a change.
+HTTP_CACHE_DIR = pathlib.Path(os.path.expanduser("~/.cache/sec_scraper/simple_http"))
+HTTP_CACHE = HttpCache(HTTP_CACHE_DIR)
+CACHE_TTL = 24 * 3600
+
+# Filings are downloaded in pieces of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 class SimpleOwnershipScraper:
     """Simple, fast scraper focused on results"""
     
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip, deflate',
         })
+        # Keep-alive connections to both SEC hosts for every worker; transient SEC errors
+        # and 429s are retried with backoff
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+            ),
+        )
+        self.session.mount('https://www.sec.gov', adapter)
+        self.session.mount('https://data.sec.gov', adapter)
+        self._rate_limiter = SecRateLimiter()
+        self._cik_lock = threading.Lock()
+        self._ticker_to_cik = None
+    
+    def _sec_get(
+        self,
+        url: str,
+        timeout: int,
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """GET an SEC URL, spacing requests from all worker threads to stay under SEC's rate limit"""
+        self._rate_limiter.wait()
+        return self.session.get(url, timeout=timeout, stream=stream, headers=headers)
+    
+    def _cached_get(self, url: str, timeout: int, ttl: Optional[float] = CACHE_TTL) -> Tuple[bytes, Optional[str]]:
+        """GET `url` through the disk cache, returning (body, encoding). Entries older than
+        `ttl` seconds are revalidated; without a ttl they never expire."""
+        def fetch(validators: Dict[str, str]) -> requests.Response:
+            response = self._sec_get(url, timeout=timeout, headers=validators)
+            response.raise_for_status()
+            return response
         
-    def scrape_top_companies(self, num_companies: int = 5) -> pd.DataFrame:
-        """Scrape ownership data from top companies quickly"""
+        return HTTP_CACHE.get(url, fetch, ttl)
+    
+    def _timed_company_holders(self, company: Tuple[str, str]) -> Tuple[List[Dict], List[str], float]:
+        """Worker-thread wrapper returning a company's holders, its log lines and how long it took"""
+        company_start = time.perf_counter()
+        log = []
+        holders = self._get_company_holders(*company, log)
+        return holders, log, time.perf_counter() - company_start
+        
+    def scrape_top_companies(
+        self, num_companies: int = 5, max_workers: int = MAX_WORKERS, return_arrow: bool = False
+    ) -> Union[pd.DataFrame, pa.Table]:
+        """Scrape ownership data from top companies quickly, as a DataFrame, or as an Arrow
+        table in OWNERSHIP_SCHEMA with `return_arrow`"""
         
         print(f"🚀 Simple SEC Ownership Scraper - SCALED UP")
         print(f"📊 Target: {num_companies} companies")
         print(f"⏱️  Expected time: {num_companies * 30} seconds ({num_companies * 0.5:.1f} minutes)\n")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Step 1: Get top companies (hardcoded for speed)
         companies = self._get_top_companies()[:num_companies]
         print(f"✅ Got {len(companies)} companies to process\n")
         
-        # Step 2: Process each company
+        # Step 2: Process the companies on a thread pool so their SEC round-trips overlap;
+        # map hands results back in list order, and each company's log is printed with them
         all_data = []
         
-        for i, (ticker, company_name) in enumerate(companies, 1):
-            print(f"--- {i}/{len(companies)}: {ticker} ({company_name}) ---")
-            
-            company_start = time.time()
-            holders = self._get_company_holders(ticker, company_name)
-            company_time = time.time() - company_start
-            
-            if holders:
-                all_data.extend(holders)
-                print(f"✅ Found {len(holders)} holders in {company_time:.1f}s")
-            else:
-                print(f"⚠️  No data found in {company_time:.1f}s")
+        with company_pool(max_workers) as pool:
+            results = pool.map(self._timed_company_holders, companies)
             
-            # Progress indicator
-            if i % 10 == 0:
-                elapsed = time.time() - start_time
-                rate = i / elapsed
-                remaining = (len(companies) - i) / rate if rate > 0 else 0
-                print(f"📊 Progress: {i}/{len(companies)} companies ({i/len(companies)*100:.1f}%) - ETA: {remaining/60:.1f} min\n")
-            else:
-                print()  # Empty line for readability
+            for i, ((ticker, company_name), (holders, log, company_time)) in enumerate(zip(companies, results), 1):
+                # Everything printed for a company goes out in a single write
+                report = [f"--- {i}/{len(companies)}: {ticker} ({company_name}) ---", *log]
+                
+                if holders:
+                    all_data.extend(holders)
+                    report.append(f"✅ Found {len(holders)} holders in {company_time:.1f}s")
+                else:
+                    report.append(f"⚠️  No data found in {company_time:.1f}s")
+                
+                # Progress indicator
+                if i % 10 == 0:
+                    elapsed = time.perf_counter() - start_time
+                    rate = i / elapsed
+                    remaining = (len(companies) - i) / rate if rate > 0 else 0
+                    report.append(f"📊 Progress: {i}/{len(companies)} companies ({i/len(companies)*100:.1f}%) - ETA: {remaining/60:.1f} min\n")
+                else:
+                    report.append('')  # Empty line for readability
+                
+                print('\n'.join(report))
         
         # Step 3: Create results
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         
         if all_data:
-            df = pd.DataFrame(all_data)
+            table = pa.Table.from_pylist(all_data, schema=OWNERSHIP_SCHEMA)
             print(f"🎉 COMPLETE! Total time: {total_time:.1f}s")
-            print(f"📊 Collected {len(df)} records from {df['ticker'].nunique()} companies")
-            return df
+            print(f"📊 Collected {table.num_rows} records from {len(table['ticker'].unique())} companies")
         else:
+            table = OWNERSHIP_SCHEMA.empty_table()
             print(f"❌ No data collected in {total_time:.1f}s")
-            return pd.DataFrame()
+        
+        return table if return_arrow else table.to_pandas()
     
-    def _get_top_companies(self) -> List[tuple]:
+    def _get_top_companies(self) -> Tuple[Tuple[str, str], ...]:
         """Get top companies list (expanded for comprehensive analysis)"""
-        # Top 60 S&P 500 companies by market cap
-        return [
-            ('AAPL', 'Apple Inc.'),
-            ('MSFT', 'Microsoft Corporation'),
-            ('GOOGL', 'Alphabet Inc.'),
-            ('AMZN', 'Amazon.com Inc.'),
-            ('NVDA', 'NVIDIA Corporation'),
-            ('TSLA', 'Tesla Inc.'),
-            ('META', 'Meta Platforms Inc.'),
-            ('BRK-B', 'Berkshire Hathaway Inc.'),
-            ('UNH', 'UnitedHealth Group Inc.'),
-            ('JNJ', 'Johnson & Johnson'),
-            ('XOM', 'Exxon Mobil Corporation'),
-            ('JPM', 'JPMorgan Chase & Co.'),
-            ('V', 'Visa Inc.'),
-            ('PG', 'Procter & Gamble Company'),
-            ('MA', 'Mastercard Incorporated'),
-            ('HD', 'Home Depot Inc.'),
-            ('CVX', 'Chevron Corporation'),
-            ('ABBV', 'AbbVie Inc.'),
-            ('PFE', 'Pfizer Inc.'),
-            ('KO', 'Coca-Cola Company'),
-            ('LLY', 'Eli Lilly and Company'),
-            ('AVGO', 'Broadcom Inc.'),
-            ('WMT', 'Walmart Inc.'),
-            ('BAC', 'Bank of America Corporation'),
-            ('ORCL', 'Oracle Corporation'),
-            ('CRM', 'Salesforce Inc.'),
-            ('COST', 'Costco Wholesale Corporation'),
-            ('NFLX', 'Netflix Inc.'),
-            ('AMD', 'Advanced Micro Devices Inc.'),
-            ('ADBE', 'Adobe Inc.'),
-            ('TMO', 'Thermo Fisher Scientific Inc.'),
-            ('ACN', 'Accenture plc'),
-            ('MRK', 'Merck & Co. Inc.'),
-            ('TXN', 'Texas Instruments Incorporated'),
-            ('LIN', 'Linde plc'),
-            ('CSCO', 'Cisco Systems Inc.'),
-            ('ABT', 'Abbott Laboratories'),
-            ('WFC', 'Wells Fargo & Company'),
-            ('DHR', 'Danaher Corporation'),
-            ('VZ', 'Verizon Communications Inc.'),
-            ('QCOM', 'QUALCOMM Incorporated'),
-            ('INTC', 'Intel Corporation'),
-            ('CMCSA', 'Comcast Corporation'),
-            ('IBM', 'International Business Machines Corporation'),
-            ('T', 'AT&T Inc.'),
-            ('CAT', 'Caterpillar Inc.'),
-            ('GE', 'General Electric Company'),
-            ('NEE', 'NextEra Energy Inc.'),
-            ('RTX', 'Raytheon Technologies Corporation'),
-            ('HON', 'Honeywell International Inc.'),
-            ('SPGI', 'S&P Global Inc.'),
-            ('LOW', 'Lowe\'s Companies Inc.'),
-            ('INTU', 'Intuit Inc.'),
-            ('UPS', 'United Parcel Service Inc.'),
-            ('MS', 'Morgan Stanley'),
-            ('GS', 'Goldman Sachs Group Inc.'),
-            ('AMGN', 'Amgen Inc.'),
-            ('DE', 'Deere & Company'),
-            ('BKNG', 'Booking Holdings Inc.'),
-            ('BLK', 'BlackRock Inc.')
-        ]
+        return TOP_COMPANIES
     
-    def _get_company_holders(self, ticker: str, company_name: str) -> List[Dict]:
-        """Get institutional holders for a company"""
+    def _get_company_holders(self, ticker: str, company_name: str, log: List[str]) -> List[Dict]:
+        """Get institutional holders for a company, appending progress lines to `log`"""
         
         try:
             # Step 1: Get CIK
-            print(f"  🔍 Getting CIK for {ticker}...")
+            log.append(f"  🔍 Getting CIK for {ticker}...")
             cik = self._get_cik(ticker)
             if not cik:
-                print(f"  ❌ No CIK found")
+                log.append(f"  ❌ No CIK found")
                 return []
-            print(f"  ✅ CIK: {cik}")
+            log.append(f"  ✅ CIK: {cik}")
             
             # Step 2: Get latest filing
-            print(f"  📥 Getting latest DEF 14A...")
+            log.append(f"  📥 Getting latest DEF 14A...")
             filing_url = self._get_latest_filing_url(cik)
             if not filing_url:
-                print(f"  ❌ No DEF 14A found")
+                log.append(f"  ❌ No DEF 14A found")
                 return []
-            print(f"  ✅ Filing found")
+            log.append(f"  ✅ Filing found")
             
             # Step 3: Download and parse
-            print(f"  📄 Downloading filing...")
+            log.append(f"  📄 Downloading filing...")
             content = self._download_filing(filing_url)
             if not content:
-                print(f"  ❌ Download failed")
+                log.append(f"  ❌ Download failed")
                 return []
-            print(f"  ✅ Downloaded {len(content):,} bytes")
+            log.append(f"  ✅ Downloaded {len(content):,} bytes")
             
             # Step 4: Extract holders
-            print(f"  🔍 Extracting holders...")
+            log.append(f"  🔍 Extracting holders...")
             holders = self._extract_holders_simple(content, ticker, company_name)
-            print(f"  ✅ Found {len(holders)} institutional holders")
+            log.append(f"  ✅ Found {len(holders)} institutional holders")
             
             return holders
             
         except Exception as e:
-            print(f"  ❌ Error: {str(e)[:50]}")
+            log.append(f"  ❌ Error: {str(e)[:50]}")
             return []
     
     def _get_cik(self, ticker: str) -> Optional[str]:
         """Get CIK for ticker"""
         try:
-            url = "https://www.sec.gov/files/company_tickers.json"
-            response = self.session.get(url, timeout=10)
-            data = response.json()
-            
-            for record in data.values():
-                if record['ticker'].upper() == ticker.upper():
-                    return str(record['cik_str']).zfill(10)
-            
-            return None
+            return self._get_ticker_map().get(ticker.upper())
         except:
             return None
     
+    def _get_ticker_map(self) -> Dict[str, str]:
+        """Upper-case ticker -> zero-padded CIK, built once from SEC's ticker file"""
+        with self._cik_lock:  # First caller loads the map; other workers wait for it
+            if self._ticker_to_cik is None:
+                self._ticker_to_cik = load_cik_map(self._sec_get)
+        return self._ticker_to_cik
+    
     def _get_latest_filing_url(self, cik: str) -> Optional[str]:
         """Get latest DEF 14A filing URL"""
         try:
-            url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-            response = self.session.get(url, timeout=15)
-            data = response.json()
+            url = SUBMISSIONS_URL.format(cik=cik)
+            body, _ = self._cached_get(url, timeout=15)
+            data = json.loads(body)
             
             filings = data.get('filings', {}).get('recent', {})
             forms = filings.get('form', [])
             accessions = filings.get('accessionNumber', [])
             primary_docs = filings.get('primaryDocument', [])
             
-            # Find latest DEF 14A
-            for i, form in enumerate(forms):
-                if str(form).strip().upper() in ['DEF 14A']:
-                    acc_no = accessions[i].replace('-', '')
-                    primary_doc = primary_docs[i] if i < len(primary_docs) else ""
-                    
-                    if primary_doc:
-                        return f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{acc_no}/{primary_doc}"
+            # Find latest DEF 14A: filings are listed newest first, so the first one with a
+            # primary document wins
+            for form, accession, primary_doc in zip(forms, accessions, primary_docs):
+                if primary_doc and str(form).strip().upper() == 'DEF 14A':
+                    acc_no = accession.replace('-', '')
+                    return ARCHIVE_URL.format(cik=int(cik), accession=acc_no, document=primary_doc)
             
             return None
         except:
             return None
     
     def _download_filing(self, url: str) -> Optional[str]:
-        """Download filing content"""
+        """Download filing content, lowercased for matching. A fresh download is read in chunks
+        that are spooled to the disk cache and decoded and lowercased as they arrive, so the
+        lowercased text is the only full copy of the filing kept in memory."""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return response.text
+            cached = HTTP_CACHE.fresh(url, CACHE_TTL)
+            if cached is not None:
+                body, encoding = cached
+                return body.decode(encoding or 'utf-8', errors='replace').lower()
+            
+            with self._sec_get(url, timeout=30, stream=True, headers=HTTP_CACHE.validators(url)) as response:
+                response.raise_for_status()
+                if response.status_code == 304:
+                    body, encoding = HTTP_CACHE.not_modified(url)
+                    return body.decode(encoding or 'utf-8', errors='replace').lower()
+                # SEC sends text/html, which requests decodes as Latin-1 when no charset is given
+                encoding = response.encoding or 'utf-8'
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+                parts = []
+                with HTTP_CACHE.writer(url, response) as write:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        write(chunk)
+                        parts.append(decoder.decode(chunk).lower())
+                parts.append(decoder.decode(b'', final=True).lower())
+            return ''.join(parts)
         except:
             return None
     
-    def _extract_holders_simple(self, content: str, ticker: str, company_name: str) -> List[Dict]:
-        """Simple pattern-based holder extraction"""
-        
-        # Known institutional investors with their patterns
-        institutions = {
-            'Vanguard Group': [
-                r'vanguard\s+group',
-                r'the\s+vanguard\s+group',
-                r'vanguard\s+fiduciary'
-            ],
-            'BlackRock': [
-                r'blackrock,?\s+inc',
-                r'blackrock\s+fund',
-                r'blackrock\s+institutional'
-            ],
-            'State Street': [
-                r'state\s+street\s+corp',
-                r'state\s+street\s+corporation',
-                r'state\s+street\s+global'
-            ],
-            'Fidelity': [
-                r'fidelity\s+management',
-                r'fmr\s+llc',
-                r'fidelity\s+investments'
-            ],
-            'T. Rowe Price': [
-                r't\.?\s*rowe\s+price',
-                r't\.\s*rowe\s+price\s+associates'
-            ],
-            'Berkshire Hathaway': [
-                r'berkshire\s+hathaway'
-            ],
-            'JPMorgan': [
-                r'jpmorgan\s+chase',
-                r'jp\s+morgan'
-            ],
-            'Capital Group': [
-                r'capital\s+group',
-                r'capital\s+research'
-            ]
-        }
+    def _extract_holders_simple(self, content_lower: str, ticker: str, company_name: str) -> List[Dict]:
+        """Simple pattern-based holder extraction. Takes the lowercased filing from
+        _download_filing."""
         
         holders = []
-        content_lower = content.lower()
         
-        for institution_name, patterns in institutions.items():
+        for institution_name, patterns in MAJOR_INSTITUTIONS.items():
+            if not any(keyword in content_lower for keyword in INSTITUTION_KEYWORDS[institution_name]):
+                continue
+            
             for pattern in patterns:
-                matches = list(re.finditer(pattern, content_lower))
+                # Only the first occurrence is used, so stop scanning there
+                match = pattern.search(content_lower)
                 
-                if matches:
+                if match:
                     # Look around the first match for numbers
-                    match = matches[0]
                     start = max(0, match.start() - 1000)
-                    end = min(len(content), match.end() + 1000)
-                    context = content[start:end]
+                    end = min(len(content_lower), match.end() + 1000)
+                    context = content_lower[start:end]
                     
                     # Extract shares (large numbers with commas)
-                    shares_match = re.search(r'(\d{1,3}(?:,\d{3}){1,3})', context)
+                    shares_match = _RE_SHARES.search(context)
                     shares = None
                     if shares_match:
                         try:
@@ -290,7 +409,7 @@ class SimpleOwnershipScraper:
                             pass
                     
                     # Extract percentage
-                    percent_match = re.search(r'(\d+\.?\d*)\s*%', context)
+                    percent_match = _RE_PERCENT.search(context)
                     percent = None
                     if percent_match:
                         try:
@@ -318,14 +437,20 @@ def main():
     scraper = SimpleOwnershipScraper()
     
     # Scale up to 50 companies
-    df = scraper.scrape_top_companies(num_companies=50)
+    # The Arrow table, so the CSV is written without a round trip through pandas
+    table = scraper.scrape_top_companies(num_companies=50, return_arrow=True)
     
-    if not df.empty:
+    if table.num_rows:
         # Save results
         filename = f"ownership_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(filename, index=False)
+        # PyArrow's C++ CSV writer straight from the Arrow table, so int64 share counts with
+        # gaps stay integers rather than going through pandas as floats
+        pa_csv.write_csv(table, filename)
         print(f"\n💾 Saved to: {filename}")
         
+        # pandas only for the printed summary
+        df = table.to_pandas()
+        
         # Show results
         print(f"\n📊 Results:")
         print(df.to_string(index=False))
@@ -0,0 +1,75 @@
+"""
+Filing lookups and DEF 14A ownership table parsing in the proxy holder scraper.
+"""
+
+import copy
+import os
+import sys
+
+import lxml.html
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# The scraper imports the project's database and enhanced_parser modules at load time
+scrape_proxy_holders = pytest.importorskip('scrape_proxy_holders')
+
+def _proxy_html(sep):
+    """A minimal proxy with its ownership heading and table headers split by `sep`"""
+    return (
+        f"<html><body><h2>Security{sep}Ownership of Certain Beneficial{sep}Owners</h2>"
+        f"<table><tr><th>Name of Beneficial{sep}Owner</th><th>Number of Shares</th><th>Percent of{sep}Class</th></tr>"
+        "<tr><td>The Vanguard Group, Inc.</td><td>12,000</td><td>8.2%</td></tr></table></body></html>"
+    )
+
+@pytest.mark.parametrize('sep', ['&#160;', '&nbsp;', '\xa0', '\n', ' '])
+def test_ownership_keywords_allow_nbsp_and_line_breaks(sep):
+    df = scrape_proxy_holders.parse_proxy_content(_proxy_html(sep))
+
+    assert df is not None
+    assert df['holder'].tolist() == ['Vanguard Group']
+    assert df['percent_class'].tolist() == [8.2]
+
+def _table(html):
+    return lxml.html.fragment_fromstring(html)
+
+def test_table_to_frame_expands_rowspan_in_two_row_header():
+    table = _table(
+        '<table><tr><th rowspan="2">Name</th><th colspan="2">Amount Beneficially Owned</th></tr>'
+        '<tr><th>Shares</th><th>Percent of Class</th></tr>'
+        '<tr><td>The Vanguard Group, Inc.</td><td>12,000</td><td>8.2%</td></tr></table>'
+    )
+    df = scrape_proxy_holders._table_to_frame(table)
+
+    assert df.columns.tolist() == [
+        'Name', 'Amount Beneficially Owned Shares', 'Amount Beneficially Owned Percent of Class'
+    ]
+    assert scrape_proxy_holders.process_ownership_table(df)['percent_class'].tolist() == [8.2]
+
+def test_table_to_frame_repeats_rowspan_cells_down_the_body():
+    table = _table(
+        '<table><tr><th>Name of Beneficial Owner</th><th>Number of Shares</th><th>Percent of Class</th></tr>'
+        '<tr><td rowspan="2">The Vanguard Group, Inc.</td><td>12,000</td><td>8.2%</td></tr>'
+        '<tr><td>13,000</td><td>9.1%</td></tr>'
+        '<tr><td>BlackRock, Inc.</td><td>11,000</td><td rowspan="2">7.0%</td></tr>'
+        '<tr><td>State Street Corp</td><td>5,000</td></tr></table>'
+    )
+    df = scrape_proxy_holders.process_ownership_table(scrape_proxy_holders._table_to_frame(table))
+
+    assert df['holder'].tolist() == ['Vanguard Group', 'Vanguard Group', 'BlackRock', 'State Street']
+    assert df['shares'].tolist() == [12000, 13000, 11000, 5000]
+    assert df['percent_class'].tolist() == [8.2, 9.1, 7.0, 7.0]
+
+def test_filing_lookups_accept_a_submissions_payload():
+    subs = {"filings": {"recent": {
+        "form": ["10-K", "DEF 14A", "def 14a ", "8-K"],
+        "filingDate": ["2024-01-01", "2023-03-01", "2024-03-01", "2024-05-01"],
+        "accessionNumber": ["0001-23-1", "0001-23-2", "0001-23-3", "0001-23-4"],
+        "primaryDocument": ["a.htm", "b.htm", "c.htm", "d.htm"],
+    }}}
+    before = copy.deepcopy(subs)
+
+    assert scrape_proxy_holders.find_latest_def14a(subs) == ("2024-03-01", "0001233", "c.htm")
+    assert scrape_proxy_holders.get_primary_document_from_submissions(subs, "0001232") == "b.htm"
+    assert scrape_proxy_holders.get_primary_document_from_submissions(subs, "missing") == ""
+    assert subs == before
@@ -0,0 +1,72 @@
+"""
+Round trips through the analysis scripts' save/load helpers and their on-disk caches.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+
+import _shared
+from _shared import export_frame, load_ownership_data, parquet_sibling, save_ownership_data
+
+def _ownership_frame(holders=('Vanguard Group', 'BlackRock', 'State Street')):
+    return pd.DataFrame({
+        'ticker': ['AAPL', 'AAPL', 'MSFT'],
+        'company_name': ['Apple Inc.', 'Apple Inc.', 'Microsoft Corporation'],
+        'holder_name': list(holders),
+        'shares': [1302.0, None, 123456789.0],
+        'percent_owned': [8.43, 6.7, 0.1],
+    }).astype(_shared.DTYPES)
+
+def _bump_mtime(path):
+    """Move `path`'s mtime a second on, so a rewrite is never hidden by the clock's resolution"""
+    later = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(later, later))
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / 'cache'
+    monkeypatch.setattr(_shared, 'CACHE_DIR', str(cache))
+    return cache
+
+def test_save_then_load_round_trips(tmp_path):
+    df = _ownership_frame()
+    csv_path = tmp_path / 'ownership.csv'
+
+    assert save_ownership_data(df, csv_path) == parquet_sibling(csv_path)
+    pd.testing.assert_frame_equal(load_ownership_data(csv_path), df)
+
+    # The CSV alone, through the PyArrow parser and then from the Feather cache, gives the same frame
+    os.remove(parquet_sibling(csv_path))
+    pd.testing.assert_frame_equal(load_ownership_data(csv_path), df)
+    pd.testing.assert_frame_equal(load_ownership_data(csv_path), df)
+
+def test_rewritten_csv_wins_over_stale_parquet(tmp_path):
+    csv_path = tmp_path / 'ownership.csv'
+    save_ownership_data(_ownership_frame(), csv_path)
+
+    updated = _ownership_frame(holders=('Fidelity', 'Fidelity', 'JPMorgan'))
+    export_frame(updated, csv_path)
+    _bump_mtime(csv_path)
+
+    pd.testing.assert_frame_equal(load_ownership_data(csv_path), updated)
+
+def test_rewritten_csv_wins_over_stale_feather_cache(tmp_path, cache_dir):
+    csv_path = tmp_path / 'ownership.csv'
+    export_frame(_ownership_frame(), csv_path)
+    load_ownership_data(csv_path)
+    old_caches = set(os.listdir(cache_dir))
+
+    # Same size as the first version, so only the mtime tells them apart
+    updated = _ownership_frame(holders=('BlackRock', 'Vanguard Group', 'State Street'))
+    export_frame(updated, csv_path)
+    _bump_mtime(csv_path)
+
+    pd.testing.assert_frame_equal(load_ownership_data(csv_path), updated)
+    # The old version's cache was replaced rather than left next to the new one
+    assert len(os.listdir(cache_dir)) == 1
+    assert set(os.listdir(cache_dir)).isdisjoint(old_caches)